@@ -2,7 +2,7 @@
 Configuration settings for PathoAssist backend.
 """
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 
 
@@ -27,6 +27,7 @@ class Settings(BaseSettings):
     EXPORTS_DIR: Path = DATA_DIR / "exports"
     MODELS_DIR: Path = DATA_DIR / "models"
     LOGS_DIR: Path = DATA_DIR / "logs"
+    CACHE_DIR: Path = DATA_DIR / "cache"  # Derived, regenerable artifacts
 
     # WSI Processing
     PATCH_SIZE: int = 224  # Standard patch size for medical imaging
@@ -34,6 +35,8 @@ class Settings(BaseSettings):
     BACKGROUND_THRESHOLD: float = 0.8  # Threshold for background detection
     MIN_TISSUE_RATIO: float = 0.1  # Minimum tissue in patch
     MAX_PATCHES_PER_SLIDE: int = 1000  # Limit for performance
+    PATCH_RESIZE_FILTER: Literal["area", "lanczos"] = "area"  # Model-input resize (OpenCV area or PIL Lanczos)
+    SLIDE_READER: Literal["openslide", "pyvips"] = "openslide"  # pyvips is optional (pip install pyvips)
 
     # ROI Selection
     ROI_TOP_K: int = 50  # Number of top ROIs to auto-select
@@ -42,13 +45,23 @@ class Settings(BaseSettings):
 
     # AI Inference
     MODEL_NAME: str = "google/medgemma-1.5-4b-it"  # Specialized Medical Model
-    USE_QUANTIZATION: bool = True  # Enable 8-bit quantization
+    USE_QUANTIZATION: bool = True  # Quantize weights with bitsandbytes (CUDA only)
+    QUANT_BITS: int = 4  # 4 (NF4) or 8 (LLM.int8)
     MAX_TOKENS: int = 4096
+    MAX_ANALYSIS_IMAGES: int = 4  # ROI patch images sent with each analysis prompt
     TEMPERATURE: float = 0.7
     TOP_P: float = 0.9
+    DETERMINISTIC: bool = False  # Greedy decoding regardless of TEMPERATURE
     DEVICE: str = "cpu"  # Will auto-detect GPU if available
     REMOTE_INFERENCE_URL: Optional[str] = None  # URL for remote inference (e.g. ngrok/colab)
     REMOTE_API_KEY: Optional[str] = None  # Optional API key for remote service
+    REMOTE_IMAGE_FORMAT: Literal["JPEG", "WEBP"] = "JPEG"  # WEBP is smaller; the server must decode it
+    REMOTE_IMAGE_TRANSPORT: Literal["json", "multipart"] = "json"  # multipart sends raw image bytes; the server must accept it
+    REMOTE_HTTP2: bool = False  # HTTP/2 to the remote API (needs httpx[http2] and an HTTP/2 server)
+    COMPILE_MODEL: bool = False  # torch.compile the forward pass (CUDA only; slow first load)
+    PROMPT_BUCKETS: list[int] = [256, 512, 1024, 2048]  # Prompt lengths padded to when compiled
+    CHAT_CACHE_MODEL: Optional[str] = None  # Sentence-embedding model for the chat response cache (optional)
+    CHAT_CACHE_THRESHOLD: float = 0.92  # Cosine similarity at which a cached chat answer is reused
 
     # Safety & Compliance
     CONFIDENCE_THRESHOLD: float = 0.6  # Minimum confidence for findings
@@ -63,6 +76,8 @@ class Settings(BaseSettings):
     # Export
     PDF_MARGIN: int = 50
     PDF_FONT_SIZE: int = 11
+    PDF_BACKEND: Literal["reportlab", "fpdf2"] = "reportlab"  # fpdf2 is optional (pip install fpdf2)
+    PDF_FONT_PATH: Optional[Path] = None  # Unicode TTF for the fpdf2 backend (a "-Bold" sibling is used if present)
 
     class Config:
         env_file = ".env"
@@ -82,6 +97,7 @@ def init_directories():
         settings.EXPORTS_DIR,
         settings.MODELS_DIR,
         settings.LOGS_DIR,
+        settings.CACHE_DIR,
     ]
 
     for directory in directories:
@@ -1,38 +1,373 @@
 """
-Report export functionality (PDF, JSON, TXT).
+Report export functionality (PDF, JSON, zstd-compressed JSON, TXT, MessagePack).
 """
-import json
+import copy
+import html
+import io
+import itertools
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
+from types import SimpleNamespace
 from datetime import datetime
-from typing import Optional
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Any, Optional
 
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.enums import TA_LEFT, TA_CENTER
+import msgpack
+import orjson
+import zstandard
+from pydantic import TypeAdapter
 
 from ..config import settings
 from ..models import StructuredReport, ExportFormat, ReportExportResult
 from ..report import ReportGenerator
 from ..utils import get_logger
 
+# ReportLab is imported lazily (see _init_reportlab) so JSON/TXT-only use
+# never pays its import cost
+if TYPE_CHECKING:
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.platypus import Paragraph, Spacer
+
 logger = get_logger(__name__)
 
+# Modern Colors
+PALETTE = {
+    "primary": "#0F766E", # Teal-700
+    "secondary": "#334155", # Slate-700
+    "accent": "#F1F5F9", # Slate-100 (Backgrounds)
+    "text": "#1E293B", # Slate-900
+    "light_teal": "#CCFBF1", # Teal-100
+    "warning_text": "#B91C1C", # Red-700
+    "warning_bg": "#FEE2E2", # Red-100
+    "summary_bg": "#F8FAFC", # Very light slate
+}
+
+EXPORT_FORMAT_VALUES = frozenset(f.value for f in ExportFormat)
+
+# Formats whose writers use report.model_dump()
+DUMP_FORMATS = frozenset({
+    ExportFormat.JSON, ExportFormat.JSON_ZST, ExportFormat.MSGPACK, ExportFormat.TXT,
+})
+
+# Serializes reports straight to JSON bytes (same layout as JSON_DUMP_OPTIONS)
+_REPORT_ADAPTER = TypeAdapter(StructuredReport)
+
+# Per-process sequence number, disambiguates exports within the same millisecond
+_EXPORT_SEQUENCE = itertools.count()
+
+PDF_WRITE_BUFFER_SIZE = 1024 * 1024  # 1 MB
+PDF_IMAGE_DPI = 150  # Print resolution for embedded ROI patches
+ROI_IMAGE_INCHES = 3.2  # Printed ROI tile edge length
+THUMBNAIL_JPEG_QUALITY = 82
+PDF_MAX_ROI_IMAGES = 6
+WRITE_BUFFER_SIZE = io.DEFAULT_BUFFER_SIZE * 16
+TEXT_WRITE_BUFFER_SIZE = 1 << 20  # 1 MB
+ZSTD_LEVEL = 3
+TEXT_CACHE_SIZE = 32  # Recent TXT renderings kept per exporter
+THUMBNAIL_CACHE_SIZE = 256  # ROI JPEGs kept in memory (~50 KB each)
+JSON_DUMP_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+
+# Microscopic findings table rows: (feature label, StructuredReport attribute)
+FINDING_FIELDS = (
+    ("Cellularity", "cellularity"),
+    ("Nuclear Atypia", "nuclear_atypia"),
+    ("Mitotic Activity", "mitotic_activity"),
+    ("Necrosis", "necrosis"),
+    ("Inflammation", "inflammation"),
+)
+
+PDF_DISCLAIMER = (
+    "<b>Disclaimer:</b> This report is generated by an AI-assisted system (PathoAssist). "
+    "Findings should be verified by a qualified pathologist."
+)
+
+# Exporter reused by every task in an export worker process
+_worker_exporter: Optional["ReportExporter"] = None
+
+# Paragraph boundary: a blank line, possibly containing whitespace
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+# Parsed Paragraphs for boilerplate text, keyed by (text hash, style name)
+_PARAGRAPH_CACHE: dict[tuple[int, str], list["Paragraph"]] = {}
+
+
+@lru_cache(maxsize=None)
+def _init_reportlab() -> tuple[Any, dict[str, Any]]:
+    """
+    Import ReportLab, apply global settings and build shared resources.
+
+    Runs once, on the first PDF export.
+
+    Returns:
+        Tuple of (sample stylesheet, palette of ReportLab colors)
+    """
+    from reportlab import rl_config
+    from reportlab.lib.colors import HexColor
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    # Skip ReportLab's per-attribute shape validation; our flowables are static
+    rl_config.shapeChecking = 0
+    rl_config.warnOnMissingFontGlyphs = 0
+
+    # Reports only use the built-in Helvetica family, so there are no TTFs to
+    # register; custom fonts belong here (pdfmetrics.registerFont) if added.
+    palette = {name: HexColor(value) for name, value in PALETTE.items()}
+    return getSampleStyleSheet(), palette
+
+
+@lru_cache(maxsize=1)
+def _get_styles() -> SimpleNamespace:
+    """
+    Build the custom PDF paragraph styles from the sample stylesheet.
+
+    Styles are never mutated after construction, so a single set is shared
+    by every exporter in the process.
+
+    Returns:
+        Namespace of paragraph styles plus the ReportLab ``palette``
+    """
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.enums import TA_LEFT, TA_CENTER
+
+    styles, palette = _init_reportlab()
+    PRIMARY_COLOR = palette["primary"]
+    SECONDARY_COLOR = palette["secondary"]
+    TEXT_COLOR = palette["text"]
+
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=26,
+        textColor=PRIMARY_COLOR,
+        spaceAfter=4,
+        alignment=TA_LEFT,
+        fontName='Helvetica-Bold'
+    )
+
+    subtitle_style = ParagraphStyle(
+        'CustomSubtitle',
+        parent=styles['Heading2'],
+        fontSize=11,
+        textColor=SECONDARY_COLOR,
+        spaceAfter=24,
+        alignment=TA_LEFT,
+        fontName='Helvetica'
+    )
+
+    heading_style = ParagraphStyle(
+        'SectionHeader',
+        parent=styles['Heading2'],
+        fontSize=13,
+        textColor=PRIMARY_COLOR,
+        spaceAfter=10,
+        spaceBefore=16,
+        borderPadding=(0, 0, 6, 0),
+        borderWidth=1,
+        borderColor=PRIMARY_COLOR, # Underline effect
+        fontName='Helvetica-Bold'
+    )
+
+    label_style = ParagraphStyle(
+        'Label',
+        parent=styles['Normal'],
+        fontSize=9,
+        textColor=SECONDARY_COLOR,
+        fontName='Helvetica-Bold'
+    )
+
+    body_style = ParagraphStyle(
+        'CustomBody',
+        parent=styles['Normal'],
+        fontSize=10,
+        textColor=TEXT_COLOR,
+        spaceAfter=8,
+        leading=15 # Better line spacing
+    )
+
+    narrative_style = ParagraphStyle(
+        'Narrative',
+        parent=body_style,
+        fontSize=10,
+        leading=16,
+        textColor=TEXT_COLOR
+    )
+
+    warning_style = ParagraphStyle(
+        'Warning',
+        parent=styles['Normal'],
+        fontSize=9,
+        textColor=palette["warning_text"],
+        spaceAfter=6,
+        backColor=palette["warning_bg"],
+        borderPadding=6,
+        borderRadius=4
+    )
+
+    caption_style = ParagraphStyle(
+        'Caption',
+        parent=styles['Normal'],
+        fontSize=8,
+        alignment=TA_CENTER,
+        textColor=SECONDARY_COLOR
+    )
+
+    return SimpleNamespace(
+        title=title_style,
+        subtitle=subtitle_style,
+        heading=heading_style,
+        label=label_style,
+        body=body_style,
+        narrative=narrative_style,
+        warning=warning_style,
+        caption=caption_style,
+        palette=palette,
+    )
+
+
+def _cached_paragraphs(text: str, style: "ParagraphStyle") -> list["Paragraph"]:
+    """
+    Get Paragraph flowables for boilerplate text, parsing the markup only once.
+
+    Only use this for text that is identical across exports (e.g. the
+    disclaimer); per-report text would grow the cache without bound.
+
+    The cached Paragraphs never enter a document themselves: layout stores
+    per-build state on flowables (wrap results, ``_postponed`` when pushed to
+    the next page), so each call returns shallow copies that share the
+    parsed fragments.
+
+    Args:
+        text: Paragraph markup, blocks separated by blank lines
+        style: Paragraph style
+
+    Returns:
+        List of Paragraph flowables
+    """
+    key = (hash(text), style.name)
+    paragraphs = _PARAGRAPH_CACHE.get(key)
+    if paragraphs is None:
+        from reportlab.platypus import Paragraph
+
+        paragraphs = [
+            Paragraph(block, style)
+            for para in _PARAGRAPH_BREAK.split(text)
+            if (block := para.strip())
+        ]
+        _PARAGRAPH_CACHE[key] = paragraphs
+    return [copy.copy(paragraph) for paragraph in paragraphs]
+
+
+def _msgpack_default(obj: Any) -> Any:
+    """Encode values msgpack has no native type for, matching the JSON export."""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Cannot serialize {type(obj).__name__} to MessagePack")
+
+
+@lru_cache(maxsize=THUMBNAIL_CACHE_SIZE)
+def _thumbnail_bytes(path: str, mtime_ns: int) -> bytes:
+    """
+    Read a cached JPEG thumbnail, keeping recent ones in memory.
+
+    Args:
+        path: Thumbnail file path
+        mtime_ns: Thumbnail modification time, so rewritten files miss the cache
+
+    Returns:
+        JPEG bytes
+    """
+    return Path(path).read_bytes()
+
+
+def _init_export_worker() -> None:
+    """Import ReportLab and build the PDF styles once per worker process."""
+    global _worker_exporter
+
+    _worker_exporter = ReportExporter()
+    _get_styles()
+
+
+def _export_one(
+    report_data: dict,
+    format_value: str,
+    include_images: bool,
+    exports_dir: str,
+) -> ReportExportResult:
+    """
+    Export a single report inside a worker process.
+
+    Args:
+        report_data: ``report.model_dump()`` of the report to export
+        format_value: Export format value
+        include_images: Whether to include images (for PDF)
+        exports_dir: Directory to write the export to
+
+    Returns:
+        Export result with file path
+    """
+    exporter = _worker_exporter or ReportExporter()
+    exporter.exports_dir = Path(exports_dir)
+    report = StructuredReport.model_validate(report_data)
+    return exporter.export_report(report, ExportFormat(format_value), include_images)
+
+
+def _spacer(height: float) -> "Spacer":
+    """
+    Create a vertical Spacer.
+
+    Spacers are built per document rather than shared: ReportLab flags a
+    flowable it pushes to the next page, and a shared instance would carry
+    that flag into later builds.
+
+    Args:
+        height: Height in inches
+
+    Returns:
+        Spacer flowable
+    """
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Spacer
+
+    return Spacer(1, height * inch)
+
+
+def _static_paragraph(text: str, style: "ParagraphStyle") -> "Paragraph":
+    """
+    Get a cached Paragraph for fixed text such as headings and field labels.
+
+    Args:
+        text: Paragraph markup
+        style: Paragraph style
+
+    Returns:
+        Paragraph flowable
+    """
+    return _cached_paragraphs(text, style)[0]
+
 
 class ReportExporter:
     """Exports reports to various formats."""
 
+    # Export directory index, keyed by directory path: (dir mtime_ns, index)
+    _index_cache: dict[str, tuple[int, dict]] = {}
+
     def __init__(self):
         """Initialize report exporter."""
         self.exports_dir = settings.EXPORTS_DIR
         self.report_generator = ReportGenerator()
+        self._text_cache: OrderedDict[int, str] = OrderedDict()
 
     def export_report(
         self,
         report: StructuredReport,
         format: ExportFormat,
         include_images: bool = False,
+        report_data: Optional[dict] = None,
     ) -> ReportExportResult:
         """
         Export report to specified format.
@@ -41,30 +376,49 @@ class ReportExporter:
             report: Structured report
             format: Export format
             include_images: Whether to include images (for PDF)
+            report_data: Optional precomputed ``report.model_dump()``
 
         Returns:
             Export result with file path
         """
         logger.info(f"Exporting report for case {report.case_id} as {format.value}")
 
-        # Generate filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Generate filename: epoch millis plus pid/sequence so that concurrent
+        # exports of the same case never collide
+        timestamp = f"{time.time_ns() // 1_000_000:013d}-{os.getpid()}-{next(_EXPORT_SEQUENCE)}"
         filename = f"{report.case_id}_{timestamp}.{format.value}"
         output_path = self.exports_dir / filename
 
-        # Export based on format
-        if format == ExportFormat.PDF:
-            self._export_pdf(report, output_path, include_images)
-        elif format == ExportFormat.JSON:
-            self._export_json(report, output_path)
-        elif format == ExportFormat.TXT:
-            self._export_txt(report, output_path)
-        else:
-            raise ValueError(f"Unsupported export format: {format}")
+        # Write to a staging file and rename it into place, so readers never
+        # see a partially written export
+        tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
+
+        try:
+            # Export based on format
+            if format == ExportFormat.PDF:
+                self._export_pdf(report, tmp_path, include_images)
+            elif format == ExportFormat.JSON:
+                self._export_json(report, tmp_path, report_data)
+            elif format == ExportFormat.JSON_ZST:
+                self._export_json_zst(report, tmp_path, report_data)
+            elif format == ExportFormat.TXT:
+                self._export_txt(report, tmp_path, report_data)
+            elif format == ExportFormat.MSGPACK:
+                self._export_msgpack(report, tmp_path, report_data)
+            else:
+                raise ValueError(f"Unsupported export format: {format}")
+
+            os.replace(tmp_path, output_path)
+        except Exception:
+            tmp_path.unlink(missing_ok=True)
+            raise
 
         # Get file size
         file_size = output_path.stat().st_size
 
+        # New file in the exports dir; force the next lookup to rescan
+        self._index_cache.pop(str(self.exports_dir), None)
+
         result = ReportExportResult(
             case_id=report.case_id,
             format=format,
@@ -76,6 +430,87 @@ class ReportExporter:
 
         return result
 
+    def export_report_multi(
+        self,
+        report: StructuredReport,
+        formats: list[ExportFormat],
+        include_images: bool = False,
+    ) -> list[ReportExportResult]:
+        """
+        Export report to several formats concurrently.
+
+        The model is dumped once and shared by the JSON/MessagePack/TXT writers;
+        each format is written on its own worker thread.
+
+        Args:
+            report: Structured report
+            formats: Export formats (duplicates are ignored)
+            include_images: Whether to include images (for PDF)
+
+        Returns:
+            Export results, in the order of ``formats``
+        """
+        formats = list(dict.fromkeys(formats))
+        if not formats:
+            return []
+
+        report_data = report.model_dump() if DUMP_FORMATS.intersection(formats) else None
+
+        with ThreadPoolExecutor(max_workers=len(formats)) as executor:
+            futures = [
+                executor.submit(self.export_report, report, format, include_images, report_data)
+                for format in formats
+            ]
+            return [future.result() for future in futures]
+
+    def export_reports_batch(
+        self,
+        reports: list[StructuredReport],
+        format: ExportFormat,
+        include_images: bool = False,
+    ) -> list[ReportExportResult]:
+        """
+        Export several reports to the same format in parallel processes.
+
+        ReportLab layout is CPU-bound and holds the GIL, so reports are
+        fanned out across a process pool; each worker imports ReportLab and
+        builds its styles once.
+
+        Args:
+            reports: Structured reports
+            format: Export format
+            include_images: Whether to include images (for PDF)
+
+        Returns:
+            Export results, in the order of ``reports``
+        """
+        if not reports:
+            return []
+        if len(reports) == 1:
+            return [self.export_report(reports[0], format, include_images)]
+
+        results: list[Optional[ReportExportResult]] = [None] * len(reports)
+        workers = min(len(reports), os.cpu_count() or 1)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_export_worker) as executor:
+            futures = {
+                executor.submit(
+                    _export_one,
+                    report.model_dump(),
+                    format.value,
+                    include_images,
+                    str(self.exports_dir),
+                ): idx
+                for idx, report in enumerate(reports)
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+        # Workers wrote new files; force the next lookup to rescan
+        self._index_cache.pop(str(self.exports_dir), None)
+
+        return results
+
     def _export_pdf(
         self,
         report: StructuredReport,
@@ -83,115 +518,80 @@ class ReportExporter:
         include_images: bool = False,
     ) -> None:
         """
-        Export report as PDF.
+        Export report as PDF with the configured backend (``PDF_BACKEND``).
 
         Args:
             report: Structured report
             output_path: Output file path
             include_images: Whether to include images
         """
-        from reportlab.platypus import Image as RLImage, Table, TableStyle, Frame, Spacer
-        from reportlab.lib import colors
-        from reportlab.lib.colors import HexColor
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(
-            str(output_path),
-            pagesize=letter,
-            leftMargin=settings.PDF_MARGIN,
-            rightMargin=settings.PDF_MARGIN,
-            topMargin=settings.PDF_MARGIN,
-            bottomMargin=settings.PDF_MARGIN,
-        )
+        if settings.PDF_BACKEND != "fpdf2":
+            self._export_pdf_reportlab(report, output_path, include_images)
+            return
 
-        # Define styles
-        styles = getSampleStyleSheet()
+        from .pdf_fpdf2 import render_pdf
 
-        # Modern Colors
-        PRIMARY_COLOR = HexColor("#0F766E") # Teal-700
-        SECONDARY_COLOR = HexColor("#334155") # Slate-700
-        ACCENT_COLOR = HexColor("#F1F5F9") # Slate-100 (Backgrounds)
-        TEXT_COLOR = HexColor("#1E293B") # Slate-900
-        LIGHT_TEAL = HexColor("#CCFBF1") # Teal-100
-
-        # Custom Styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=26,
-            textColor=PRIMARY_COLOR,
-            spaceAfter=4,
-            alignment=TA_LEFT,
-            fontName='Helvetica-Bold'
-        )
+        roi_images = []
+        if include_images:
+            try:
+                roi_images = self._load_roi_images(report.case_id)
+            except Exception as e:
+                logger.error(f"Error adding images: {e}")
 
-        subtitle_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=styles['Heading2'],
-            fontSize=11,
-            textColor=SECONDARY_COLOR,
-            spaceAfter=24,
-            alignment=TA_LEFT,
-            fontName='Helvetica'
-        )
+        render_pdf(report, output_path, roi_images)
 
-        section_header_style = ParagraphStyle(
-            'SectionHeader',
-            parent=styles['Heading2'],
-            fontSize=13,
-            textColor=PRIMARY_COLOR,
-            spaceAfter=10,
-            spaceBefore=16,
-            borderPadding=(0, 0, 6, 0),
-            borderWidth=1,
-            borderColor=PRIMARY_COLOR, # Underline effect
-            fontName='Helvetica-Bold'
-        )
+        logger.info(f"PDF report generated (fpdf2): {output_path}")
 
-        label_style = ParagraphStyle(
-            'Label',
-            parent=styles['Normal'],
-            fontSize=9,
-            textColor=SECONDARY_COLOR,
-            fontName='Helvetica-Bold'
-        )
-        
-        body_style = ParagraphStyle(
-            'CustomBody',
-            parent=styles['Normal'],
-            fontSize=10,
-            textColor=TEXT_COLOR,
-            spaceAfter=8,
-            leading=15 # Better line spacing
-        )
-        
-        narrative_style = ParagraphStyle(
-            'Narrative',
-            parent=body_style,
-            fontSize=10,
-            leading=16,
-            textColor=TEXT_COLOR
-        )
-        
-        warning_style = ParagraphStyle(
-            'Warning',
-            parent=styles['Normal'],
-            fontSize=9,
-            textColor=HexColor("#B91C1C"), # Red-700
-            spaceAfter=6,
-            backColor=HexColor("#FEE2E2"), # Red-100
-            borderPadding=6,
-            borderRadius=4
+    def _export_pdf_reportlab(
+        self,
+        report: StructuredReport,
+        output_path: Path,
+        include_images: bool = False,
+    ) -> None:
+        """
+        Export report as PDF with ReportLab.
+
+        Args:
+            report: Structured report
+            output_path: Output file path
+            include_images: Whether to include images
+        """
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import letter
+        from reportlab.lib.units import inch
+        from reportlab.platypus import (
+            SimpleDocTemplate, Paragraph, Table, TableStyle,
         )
 
+        s = _get_styles()
+
+        # Modern Colors
+        PRIMARY_COLOR = s.palette["primary"]
+        ACCENT_COLOR = s.palette["accent"]
+
+        # Cached styles
+        title_style = s.title
+        subtitle_style = s.subtitle
+        section_header_style = s.heading
+        label_style = s.label
+        body_style = s.body
+        narrative_style = s.narrative
+        warning_style = s.warning
+
         # Build content
         content = []
 
+        # Report text is plain text, not Paragraph markup: escape &, < and >
+        # once up front so ReportLab's parser never drops or chokes on them
+        escape = partial(html.escape, quote=False)
+
         # --- HEADER ---
         # Logo placeholder logic could go here
-        content.append(Paragraph("PathoAssist", title_style))
-        content.append(Paragraph("AI-POWERED PATHOLOGY ANALYSIS REPORT", subtitle_style))
-        content.append(Spacer(1, 0.1 * inch))
+        content.extend([
+            _static_paragraph("PathoAssist", title_style),
+            _static_paragraph("AI-POWERED PATHOLOGY ANALYSIS REPORT", subtitle_style),
+            _spacer(0.1),
+        ])
 
         # --- PATIENT & CASE DETAILS (Boxed Table) ---
         md = report.slide_metadata
@@ -205,17 +605,21 @@ class ReportExporter:
         accession_date = report.analysis_date.strftime('%Y-%m-%d')
         body_site = md.body_site if md.body_site else "Unknown"
         
-        data = [
-            [Paragraph("PATIENT DETAILS", label_style), "", Paragraph("CASE DETAILS", label_style), ""],
-            [Paragraph("Age/Gender:", label_style), Paragraph(f"{patient_age} / {patient_gender}", body_style), 
-             Paragraph("Case ID:", label_style), Paragraph(case_id[:16], body_style)], # Truncate ID slightly if long
-             
-            [Paragraph("Body Site:", label_style), Paragraph(md.body_site or "N/A", body_style),
-             Paragraph("Date:", label_style), Paragraph(accession_date, body_style)],
-             
-            [Paragraph("Procedure:", label_style), Paragraph(md.procedure_type or "N/A", body_style),
-             Paragraph("Slide:", label_style), Paragraph(md.filename, body_style)]
-        ]
+        # Labels are fixed text, so their parsed Paragraphs are cached
+        label = partial(_static_paragraph, style=label_style)
+
+        detail_rows = (
+            ("Age/Gender:", f"{patient_age} / {patient_gender}",
+             "Case ID:", case_id[:16]), # Truncate ID slightly if long
+            ("Body Site:", md.body_site or "N/A", "Date:", accession_date),
+            ("Procedure:", md.procedure_type or "N/A", "Slide:", md.filename),
+        )
+        data = [[label("PATIENT DETAILS"), "", label("CASE DETAILS"), ""]]
+        data.extend(
+            [label(left_label), Paragraph(escape(left_value), body_style),
+             label(right_label), Paragraph(escape(right_value), body_style)]
+            for left_label, left_value, right_label, right_value in detail_rows
+        )
         
         t = Table(data, colWidths=[1*inch, 2.5*inch, 0.8*inch, 2.7*inch])
         t.setStyle(TableStyle([
@@ -227,30 +631,26 @@ class ReportExporter:
             # Vertical line in middle
             ('LINEAFTER', (1,0), (1,-1), 1, colors.lightgrey),
         ]))
-        content.append(t)
-        content.append(Spacer(1, 0.2 * inch))
+        content.extend([t, _spacer(0.2)])
 
         # --- CLINICAL HISTORY ---
         if md.clinical_history:
-            content.append(Paragraph("Clinical History", section_header_style))
             # Wrap in a light gray box for emphasis
-            c_hist = Paragraph(md.clinical_history, body_style)
-            content.append(c_hist)
-            content.append(Spacer(1, 0.1 * inch))
+            content.extend([
+                _static_paragraph("Clinical History", section_header_style),
+                Paragraph(escape(md.clinical_history), body_style),
+                _spacer(0.1),
+            ])
 
         # --- DIAGNOSTIC SUMMARY (Highlight) ---
-        content.append(Paragraph("Diagnostic Summary", section_header_style))
-        
-        summary_data = [
-            [Paragraph("<b>Tissue Classification:</b>", label_style), Paragraph(report.tissue_type.value.upper(), label_style)],
-            [Paragraph("<b>AI Confidence:</b>", label_style), Paragraph(f"{report.confidence_score:.0%}", label_style)]
-        ]
+        content.append(_static_paragraph("Diagnostic Summary", section_header_style))
         
         # Narrative Text - Put inside a colored box/table
-        narrative_paras = []
-        for para in report.narrative_summary.split('\n\n'):
-            if para.strip():
-                narrative_paras.append(Paragraph(para, narrative_style))
+        narrative_paras = [
+            Paragraph(text, narrative_style)
+            for para in _PARAGRAPH_BREAK.split(escape(report.narrative_summary))
+            if (text := para.strip())
+        ]
         
         # Create a container table for the summary to give it a background
         # We put the text inside one big cell
@@ -259,7 +659,7 @@ class ReportExporter:
         
         final_summary_table = Table([[narrative_col]], colWidths=[7*inch])
         final_summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,-1), HexColor("#F8FAFC")), # Very light slate
+            ('BACKGROUND', (0,0), (-1,-1), s.palette["summary_bg"]),
             ('BOX', (0,0), (-1,-1), 1, colors.lightgrey),
             ('TOPPADDING', (0,0), (-1,-1), 10),
             ('BOTTOMPADDING', (0,0), (-1,-1), 10),
@@ -267,24 +667,27 @@ class ReportExporter:
             ('RIGHTPADDING', (0,0), (-1,-1), 10),
         ]))
         
-        content.append(Paragraph(f"<b>Tissue Classification:</b> {report.tissue_type.value.title()}", body_style))
-        content.append(Spacer(1, 0.05 * inch))
-        content.append(final_summary_table)
-        content.append(Spacer(1, 0.2 * inch))
+        content.extend([
+            Paragraph(f"<b>Tissue Classification:</b> {report.tissue_type.value.title()}", body_style),
+            _spacer(0.05),
+            final_summary_table,
+            _spacer(0.2),
+        ])
 
         # --- STRUCTURAL & MICROSCOPIC FINDINGS (Zebra Table) ---
-        content.append(Paragraph("Microscopic Findings", section_header_style))
+        content.append(_static_paragraph("Microscopic Findings", section_header_style))
         
         findings_data = []
         # Header
-        findings_data.append([Paragraph("<b>Feature</b>", label_style), Paragraph("<b>Observation</b>", label_style)])
+        findings_data.append([label("<b>Feature</b>"), label("<b>Observation</b>")])
         
         # Rows
-        if report.cellularity: findings_data.append([Paragraph("Cellularity", body_style), Paragraph(report.cellularity, body_style)])
-        if report.nuclear_atypia: findings_data.append([Paragraph("Nuclear Atypia", body_style), Paragraph(report.nuclear_atypia, body_style)])
-        if report.mitotic_activity: findings_data.append([Paragraph("Mitotic Activity", body_style), Paragraph(report.mitotic_activity, body_style)])
-        if report.necrosis: findings_data.append([Paragraph("Necrosis", body_style), Paragraph(report.necrosis, body_style)])
-        if report.inflammation: findings_data.append([Paragraph("Inflammation", body_style), Paragraph(report.inflammation, body_style)])
+        feature = partial(_static_paragraph, style=body_style)
+        findings_data.extend(
+            [feature(feature_label), Paragraph(escape(value), body_style)]
+            for feature_label, attr in FINDING_FIELDS
+            if (value := getattr(report, attr))
+        )
         
         if len(findings_data) > 1:
             ft = Table(findings_data, colWidths=[2*inch, 5*inch])
@@ -307,141 +710,472 @@ class ReportExporter:
         
         # Additional Observations
         if report.other_findings:
-            content.append(Spacer(1, 0.1 * inch))
-            content.append(Paragraph("Detailed Observations:", label_style))
-            for finding in report.other_findings:
-                 # Bullet point style
-                 content.append(Paragraph(f"• {finding.finding}", body_style))
+            content.extend([_spacer(0.1), label("Detailed Observations:")])
+            # Bullet point style
+            content.extend(
+                Paragraph(f"• {escape(finding.finding)}", body_style)
+                for finding in report.other_findings
+            )
         
-        content.append(Spacer(1, 0.2 * inch))
+        content.append(_spacer(0.2))
         
         # --- IMAGES ---
         if include_images:
             try:
-                import json
-                roi_file = settings.CASES_DIR / report.case_id / "results" / "roi.json"
-                patches_to_show = []
-                if roi_file.exists():
-                    with open(roi_file, "r") as f:
-                        roi_data = json.load(f)
-                    patches_to_show = roi_data.get("selected_patches", [])
-                
-                if patches_to_show:
-                    content.append(PageBreak())
-                    content.append(Paragraph("Selected Regions of Interest", section_header_style))
-                    content.append(Paragraph("The following areas were selected for AI analysis based on key features.", body_style))
-                    content.append(Spacer(1, 0.15 * inch))
-                    
+                roi_images = self._load_roi_images(report.case_id)
+
+                if roi_images:
+                    from reportlab.platypus import PageBreak, Image as RLImage
+
+                    content.extend([
+                        PageBreak(),
+                        _static_paragraph("Selected Regions of Interest", section_header_style),
+                        _static_paragraph("The following areas were selected for AI analysis based on key features.", body_style),
+                        _spacer(0.15),
+                    ])
+
                     table_data = []
                     row = []
-                    
-                    for idx, patch in enumerate(patches_to_show[:6], 1): # Limit to 6
-                        patch_id = patch.get("patch_id")
-                        patch_file = settings.CASES_DIR / report.case_id / "patches" / f"{patch_id}.png"
-                        
-                        if patch_file.exists():
-                            # Create Image
-                            try:
-                                from PIL import Image as PILImage
-                                import io
-                                
-                                with PILImage.open(patch_file) as pil_img:
-                                    pil_img.load()
-                                    if pil_img.width > 400: pil_img.thumbnail((400, 400)) # Larger thumbnail for clearer grid
-                                    if pil_img.mode in ('RGBA', 'LA'):
-                                        background = PILImage.new(pil_img.mode[:-1], pil_img.size, (255, 255, 255))
-                                        background.paste(pil_img, pil_img.split()[-1])
-                                        pil_img = background
-                                    pil_img = pil_img.convert("RGB")
-                                    
-                                    img_buffer = io.BytesIO()
-                                    pil_img.save(img_buffer, format='JPEG', quality=85)
-                                    img_buffer.seek(0)
-                                    
-                                    img = RLImage(img_buffer, width=3.2*inch, height=3.2*inch)
-                                    
-                                    # Caption
-                                    coords = patch.get("coordinates", {})
-                                    caption_txt = f"<b>ROI #{idx}</b><br/>Loc: ({coords.get('x',0)}, {coords.get('y',0)})<br/>Var: {patch.get('variance_score',0):.2f}"
-                                    caption = Paragraph(caption_txt, ParagraphStyle('Caption', parent=styles['Normal'], fontSize=8, alignment=TA_CENTER, textColor=SECONDARY_COLOR))
-                                    
-                                    cell = [img, caption]
-                                    row.append(cell)
-                                    
-                                    if len(row) == 2:
-                                        table_data.append(row)
-                                        row = []
-                                        
-                            except Exception as e:
-                                logger.warning(f"Image error: {e}")
-                    
+
+                    for idx, patch, data in roi_images:
+                        # JPEG data is embedded as-is (DCTDecode), no re-encode
+                        img = RLImage(io.BytesIO(data), width=ROI_IMAGE_INCHES*inch, height=ROI_IMAGE_INCHES*inch)
+
+                        # Caption
+                        coords = patch.get("coordinates", {})
+                        caption_txt = f"<b>ROI #{idx}</b><br/>Loc: ({coords.get('x',0)}, {coords.get('y',0)})<br/>Var: {patch.get('variance_score',0):.2f}"
+                        caption = Paragraph(caption_txt, s.caption)
+
+                        cell = [img, caption]
+                        row.append(cell)
+
+                        if len(row) == 2:
+                            table_data.append(row)
+                            row = []
+
                     if row: table_data.append(row)
 
-                    if table_data:
-                        # Flatten for table
-                        final = []
-                        for r in table_data:
-                            imgs = [x[0] for x in r]
-                            caps = [x[1] for x in r]
-                            final.append(imgs)
-                            final.append(caps)
-                            final.append([Spacer(1, 0.1*inch)] * len(imgs)) # Spacing row
-                            
-                        img_table = Table(final, colWidths=[3.5*inch, 3.5*inch])
-                        img_table.setStyle(TableStyle([
-                            ('VALIGN', (0,0), (-1,-1), 'TOP'),
-                            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-                            ('TOPPADDING', (0,0), (-1,-1), 0),
-                            ('BOTTOMPADDING', (0,0), (-1,-1), 2),
-                        ]))
-                        content.append(img_table)
+                    # Flatten for table
+                    final = []
+                    for r in table_data:
+                        imgs = [x[0] for x in r]
+                        caps = [x[1] for x in r]
+                        final.append(imgs)
+                        final.append(caps)
+                        final.append([_spacer(0.1)] * len(imgs)) # Spacing row
+
+                    img_table = Table(final, colWidths=[3.5*inch, 3.5*inch])
+                    img_table.setStyle(TableStyle([
+                        ('VALIGN', (0,0), (-1,-1), 'TOP'),
+                        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+                        ('TOPPADDING', (0,0), (-1,-1), 0),
+                        ('BOTTOMPADDING', (0,0), (-1,-1), 2),
+                    ]))
+                    content.append(img_table)
 
             except Exception as e:
                 logger.error(f"Error adding images: {e}")
 
         # --- DISCLAIMER ---
-        content.append(Spacer(1, 0.5 * inch))
-        content.append(Paragraph("<b>Disclaimer:</b> This report is generated by an AI-assisted system (PathoAssist). Findings should be verified by a qualified pathologist.", warning_style))
+        content.append(_spacer(0.5))
+        content.extend(_cached_paragraphs(PDF_DISCLAIMER, warning_style))
 
-        # Build PDF
-        doc.build(content)
+        # Build PDF through a large buffer so ReportLab's many small writes coalesce
+        with open(output_path, 'wb', buffering=PDF_WRITE_BUFFER_SIZE) as f:
+            doc = SimpleDocTemplate(
+                f,
+                pagesize=letter,
+                leftMargin=settings.PDF_MARGIN,
+                rightMargin=settings.PDF_MARGIN,
+                topMargin=settings.PDF_MARGIN,
+                bottomMargin=settings.PDF_MARGIN,
+            )
+            doc.build(content)
 
         logger.info(f"PDF report generated: {output_path}")
 
-    def _export_json(self, report: StructuredReport, output_path: Path) -> None:
+    def _load_roi_images(self, case_id: str) -> list[tuple[int, dict, bytes]]:
+        """
+        Load the JPEG thumbnails of a case's selected ROI patches.
+
+        Args:
+            case_id: Case identifier
+
+        Returns:
+            List of (ROI number, patch info from roi.json, JPEG bytes), in
+            selection order; patches without an image on disk are skipped
+        """
+        # Cases without ROI selection return before any image work starts;
+        # a single read replaces an exists() check plus the read
+        roi_file = settings.CASES_DIR / case_id / "results" / "roi.json"
+        try:
+            roi_data = orjson.loads(roi_file.read_bytes())
+        except FileNotFoundError:
+            return []
+
+        patches_to_show = roi_data.get("selected_patches", [])
+        if not patches_to_show:
+            return []
+
+        # Collect patches that have an image on disk (one directory scan)
+        patches_dir = settings.CASES_DIR / case_id / "patches"
+        try:
+            with os.scandir(patches_dir) as it:
+                existing = {entry.name for entry in it}
+        except FileNotFoundError:
+            return []
+
+        candidates = []
+        for idx, patch in enumerate(patches_to_show[:PDF_MAX_ROI_IMAGES], 1):
+            patch_name = f"{patch.get('patch_id')}.png"
+            if patch_name in existing:
+                candidates.append((idx, patch, patches_dir / patch_name))
+        if not candidates:
+            return []
+
+        # Decode/convert concurrently; results are collected in order
+        roi_images = []
+        workers = min(len(candidates), os.cpu_count() or 4)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self._load_patch_jpeg, case_id, patch_file)
+                for _, _, patch_file in candidates
+            ]
+
+            for (idx, patch, _), future in zip(candidates, futures):
+                try:
+                    roi_images.append((idx, patch, future.result()))
+                except Exception as e:
+                    logger.warning(f"Image error: {e}")
+
+        return roi_images
+
+    def _load_patch_jpeg(self, case_id: str, patch_file: Path) -> bytes:
+        """
+        Get the JPEG thumbnail bytes of a patch, for use on a worker thread.
+
+        Args:
+            case_id: Case identifier
+            patch_file: Path to the PNG patch image
+
+        Returns:
+            JPEG bytes ready for embedding
+        """
+        thumb_file = self._prepare_patch_thumbnail(case_id, patch_file)
+        return _thumbnail_bytes(str(thumb_file), thumb_file.stat().st_mtime_ns)
+
+    def _prepare_patch_thumbnail(
+        self,
+        case_id: str,
+        patch_file: Path,
+        dpi: int = PDF_IMAGE_DPI,
+    ) -> Path:
+        """
+        Get a downscaled JPEG of a patch image for PDF embedding.
+
+        ReportLab embeds the full pixel data and only scales at render time,
+        and re-encodes PNGs with FlateDecode on every build. The patch is
+        resized to what the printed ROI tile needs at ``dpi`` and cached as a
+        JPEG under ``CACHE_DIR/pdf_thumbs`` for later exports.
+
+        Args:
+            case_id: Case identifier
+            patch_file: Path to the PNG patch image
+            dpi: Target print resolution
+
+        Returns:
+            Path to the cached JPEG thumbnail
+        """
+        max_px = int(ROI_IMAGE_INCHES * dpi)
+        thumb_dir = settings.CACHE_DIR / "pdf_thumbs" / case_id
+        thumb_file = thumb_dir / f"{patch_file.stem}_{max_px}.jpg"
+        if thumb_file.exists() and thumb_file.stat().st_mtime >= patch_file.stat().st_mtime:
+            return thumb_file
+
+        thumb_dir.mkdir(parents=True, exist_ok=True)
+        # Unique per process and thread: concurrent exports of the same case
+        # must not write to (and replace) each other's staging file
+        tmp_file = thumb_file.with_name(f".{thumb_file.stem}.{os.getpid()}-{threading.get_ident()}.tmp")
+
+        try:
+            self._write_thumbnail(patch_file, tmp_file, max_px)
+            os.replace(tmp_file, thumb_file)
+        except Exception:
+            tmp_file.unlink(missing_ok=True)
+            raise
+        return thumb_file
+
+    @staticmethod
+    def _write_thumbnail(patch_file: Path, output_path: Path, max_px: int) -> None:
+        """
+        Downscale a patch image and write it as a baseline JPEG.
+
+        Args:
+            patch_file: Source patch image
+            output_path: JPEG file to write
+            max_px: Longest edge of the thumbnail in pixels
+        """
+        from PIL import Image as PILImage
+
+        with PILImage.open(patch_file) as pil_img:
+            # JPEG sources decode directly at a 1/2-1/8 DCT scale; a no-op for PNG
+            pil_img.draft('RGB', (max_px, max_px))
+            pil_img.load()
+            # Cheap integer box reduction first, so the resampling filter
+            # only has to cover the remaining < 2x step
+            factor = min(pil_img.width, pil_img.height) // max_px
+            if factor >= 2:
+                pil_img = pil_img.reduce(factor)
+            if pil_img.width > max_px or pil_img.height > max_px:
+                pil_img.thumbnail((max_px, max_px))
+            if pil_img.mode in ('RGBA', 'LA'):
+                background = PILImage.new(pil_img.mode[:-1], pil_img.size, (255, 255, 255))
+                background.paste(pil_img, pil_img.split()[-1])
+                pil_img = background
+            # Baseline 4:2:0 JPEG: cheapest to encode, and chroma subsampling
+            # is invisible at the printed tile size
+            pil_img.convert("RGB").save(
+                output_path,
+                format='JPEG',
+                quality=THUMBNAIL_JPEG_QUALITY,
+                optimize=False,
+                progressive=False,
+                subsampling=2,
+            )
+
+    def _export_json(
+        self,
+        report: StructuredReport,
+        output_path: Path,
+        report_data: Optional[dict] = None,
+    ) -> None:
         """
         Export report as JSON.
 
         Args:
             report: Structured report
             output_path: Output file path
+            report_data: Optional precomputed ``report.model_dump()``
         """
-        # Convert to JSON
-        report_json = report.model_dump_json(indent=2)
+        with open(output_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            self._write_json(report, f, report_data)
+
+        logger.info(f"JSON report generated: {output_path}")
+
+    def _export_json_zst(
+        self,
+        report: StructuredReport,
+        output_path: Path,
+        report_data: Optional[dict] = None,
+    ) -> None:
+        """
+        Export report as zstd-compressed JSON.
+
+        Args:
+            report: Structured report
+            output_path: Output file path
+            report_data: Optional precomputed ``report.model_dump()``
+        """
+        compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+
+        # The stream writer compresses as JSON is written and closes the file;
+        # the file buffer coalesces its compressed frames into large writes
+        with compressor.stream_writer(open(output_path, 'wb', buffering=WRITE_BUFFER_SIZE)) as f:
+            self._write_json(report, f, report_data)
+
+        logger.info(f"Compressed JSON report generated: {output_path}")
+
+    def _write_json(
+        self,
+        report: StructuredReport,
+        f,
+        report_data: Optional[dict] = None,
+    ) -> None:
+        """
+        Write the report as indented JSON to a binary file-like object.
+
+        Args:
+            report: Structured report
+            f: Writable binary file-like object
+            report_data: Optional precomputed ``report.model_dump()``
+        """
+        if report_data is None:
+            # No shared dump to reuse: pydantic-core serializes the model to
+            # indented JSON bytes in one pass, with no intermediate dict or str
+            f.write(_REPORT_ADAPTER.dump_json(report, indent=2))
+            return
+
+        # Encode one top-level field at a time with orjson's C encoder, so peak
+        # memory is bounded by the largest field rather than the whole document.
+        # Nested values are re-indented one level; JSON strings never contain
+        # raw newlines, so the replace only touches layout.
+        if not report_data:
+            f.write(b"{}")
+            return
+
+        separator = b"{\n  "
+        for key, value in report_data.items():
+            f.write(separator)
+            f.write(orjson.dumps(key))
+            f.write(b": ")
+            f.write(orjson.dumps(value, option=JSON_DUMP_OPTIONS).replace(b"\n", b"\n  "))
+            separator = b",\n  "
+        f.write(b"\n}")
+
+    def _export_msgpack(
+        self,
+        report: StructuredReport,
+        output_path: Path,
+        report_data: Optional[dict] = None,
+    ) -> None:
+        """
+        Export report as MessagePack (compact binary equivalent of the JSON export).
+
+        Args:
+            report: Structured report
+            output_path: Output file path
+            report_data: Optional precomputed ``report.model_dump()``
+        """
+        if report_data is None:
+            report_data = report.model_dump()
+
+        # str-based enums pack as strings; datetimes go through _msgpack_default
+        report_bytes = msgpack.packb(report_data, use_bin_type=True, default=_msgpack_default)
 
         # Write to file
-        with open(output_path, 'w') as f:
-            f.write(report_json)
+        with open(output_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+            f.write(report_bytes)
 
-        logger.info(f"JSON report generated: {output_path}")
+        logger.info(f"MessagePack report generated: {output_path}")
 
-    def _export_txt(self, report: StructuredReport, output_path: Path) -> None:
+    def _export_txt(
+        self,
+        report: StructuredReport,
+        output_path: Path,
+        report_data: Optional[dict] = None,
+    ) -> None:
         """
         Export report as plain text.
 
         Args:
             report: Structured report
             output_path: Output file path
+            report_data: Optional precomputed ``report.model_dump()``
         """
         # Format report as text
-        text_content = self.report_generator.format_report_text(report)
+        text_content = self._format_report_text(report, report_data)
 
-        # Write to file
-        with open(output_path, 'w') as f:
+        # Write to file through a 1 MB binary buffer (explicit UTF-8: the text
+        # contains non-ASCII symbols and must not depend on the locale)
+        with open(output_path, 'wb', buffering=TEXT_WRITE_BUFFER_SIZE) as raw, \
+                io.TextIOWrapper(raw, encoding='utf-8', write_through=False) as f:
             f.write(text_content)
 
         logger.info(f"TXT report generated: {output_path}")
 
+    def _format_report_text(
+        self,
+        report: StructuredReport,
+        report_data: Optional[dict] = None,
+    ) -> str:
+        """
+        Format report as text, reusing the result for unchanged reports.
+
+        The same report is typically exported repeatedly (preview, then
+        download), so recent renderings are kept in a small LRU keyed on a
+        hash of the report content.
+
+        Args:
+            report: Structured report
+            report_data: Optional precomputed ``report.model_dump()``
+
+        Returns:
+            Formatted text
+        """
+        if report_data is None:
+            report_data = report.model_dump()
+        key = hash(orjson.dumps(report_data, option=orjson.OPT_SERIALIZE_NUMPY))
+
+        text_content = self._text_cache.get(key)
+        if text_content is not None:
+            self._text_cache.move_to_end(key)
+            return text_content
+
+        text_content = self.report_generator.format_report_text(report)
+        self._text_cache[key] = text_content
+        if len(self._text_cache) > TEXT_CACHE_SIZE:
+            self._text_cache.popitem(last=False)
+
+        return text_content
+
+    @staticmethod
+    def _parse_export_name(name: str) -> Optional[tuple[str, str]]:
+        """
+        Split an export filename into case ID and format.
+
+        Args:
+            name: Filename in the form ``{case_id}_{millis}-{pid}-{seq}.{format}``
+                (or the legacy ``{case_id}_{YYYYmmdd}_{HHMMSS}.{format}``)
+
+        Returns:
+            Tuple of (case_id, format value) or None if not an export file
+        """
+        # Case IDs never contain dots, so everything after the first one is
+        # the format (which may itself be compound, e.g. "json.zst")
+        stem, _, ext = name.partition(".")
+        case_id, sep, stamp = stem.rpartition("_")
+        if not sep or not case_id or ext not in EXPORT_FORMAT_VALUES:
+            return None
+
+        # Legacy stamps contain an extra underscore between date and time
+        if len(stamp) == 6 and stamp.isdigit():
+            case_id = case_id.rpartition("_")[0]
+            if not case_id:
+                return None
+
+        return case_id, ext
+
+    def _get_export_index(self) -> dict[str, dict[str, list[dict]]]:
+        """
+        Get the exports directory index, rescanning only when it changed.
+
+        The index is rebuilt with a single ``os.scandir`` pass whenever the
+        directory mtime differs from the cached one.
+
+        Returns:
+            Mapping of case_id to format value to file info dictionaries
+        """
+        key = str(self.exports_dir)
+        try:
+            dir_mtime = self.exports_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+
+        cached = self._index_cache.get(key)
+        if cached and cached[0] == dir_mtime:
+            return cached[1]
+
+        index: dict[str, dict[str, list[dict]]] = {}
+        with os.scandir(self.exports_dir) as it:
+            for entry in it:
+                if not entry.is_file():
+                    continue
+                parsed = self._parse_export_name(entry.name)
+                if parsed is None:
+                    continue
+                case_id, format_value = parsed
+                # DirEntry.stat() reuses the metadata fetched by scandir
+                stat = entry.stat()
+                index.setdefault(case_id, {}).setdefault(format_value, []).append({
+                    "format": format_value,
+                    "path": Path(entry.path),
+                    "size": stat.st_size,
+                    "mtime": stat.st_mtime,
+                })
+
+        self._index_cache[key] = (dir_mtime, index)
+        return index
+
     def get_export_path(self, case_id: str, format: ExportFormat) -> Optional[Path]:
         """
         Find most recent export for a case.
@@ -453,15 +1187,13 @@ class ReportExporter:
         Returns:
             Path to export file or None
         """
-        # Search for files matching case_id and format
-        pattern = f"{case_id}_*.{format.value}"
-        matching_files = list(self.exports_dir.glob(pattern))
+        matching_files = self._get_export_index().get(case_id, {}).get(format.value)
 
         if not matching_files:
             return None
 
         # Return most recent
-        return max(matching_files, key=lambda p: p.stat().st_mtime)
+        return max(matching_files, key=lambda f: f["mtime"])["path"]
 
     def list_exports(self, case_id: str) -> list[dict]:
         """
@@ -473,20 +1205,23 @@ class ReportExporter:
         Returns:
             List of export info dictionaries
         """
-        exports = []
-
-        for format in ExportFormat:
-            pattern = f"{case_id}_*.{format.value}"
-            for file_path in self.exports_dir.glob(pattern):
-                exports.append({
-                    "case_id": case_id,
-                    "format": format.value,
-                    "file_path": str(file_path),
-                    "file_size": file_path.stat().st_size,
-                    "created_at": datetime.fromtimestamp(file_path.stat().st_mtime).isoformat(),
-                })
+        # Sort by creation date (newest first) on the raw mtimes from the
+        # directory scan, before any formatting
+        files = sorted(
+            itertools.chain.from_iterable(self._get_export_index().get(case_id, {}).values()),
+            key=lambda f: f["mtime"],
+            reverse=True,
+        )
 
-        # Sort by creation date (newest first)
-        exports.sort(key=lambda x: x["created_at"], reverse=True)
+        exports = [
+            {
+                "case_id": case_id,
+                "format": file_info["format"],
+                "file_path": str(file_info["path"]),
+                "file_size": file_info["size"],
+                "created_at": datetime.fromtimestamp(file_info["mtime"]).isoformat(),
+            }
+            for file_info in files
+        ]
 
         return exports
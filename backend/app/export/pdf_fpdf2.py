@@ -0,0 +1,286 @@
+"""
+fpdf2 PDF backend (opt-in, ``PDF_BACKEND=fpdf2``).
+
+Renders the same sections as the ReportLab exporter with fpdf2's
+immediate-mode API, which has no separate flowable layout pass.
+Requires the optional ``fpdf2`` package.
+"""
+import io
+import unicodedata
+from pathlib import Path
+
+from ..config import settings
+from ..models import StructuredReport
+from ..utils import get_logger
+
+logger = get_logger(__name__)
+
+POINTS_PER_INCH = 72
+UNICODE_FONT_FAMILY = "report"  # Family name the PDF_FONT_PATH font is registered under
+
+# Typographic and clinical symbols common in model output, mapped to Latin-1
+# equivalents (the micro sign stands in for Greek mu)
+_LATIN1_FALLBACKS = str.maketrans({
+    "\u2013": "-", "\u2014": "-", "\u2018": "'", "\u2019": "'",
+    "\u201c": '"', "\u201d": '"', "\u2022": "-", "\u2026": "...",
+    "\u2264": "<=", "\u2265": ">=", "\u2260": "!=", "\u2248": "~",
+    "\u2212": "-", "\u2190": "<-", "\u2192": "->", "\u03bc": "\u00b5",
+})
+
+
+def _latin1(text: str) -> str:
+    """
+    Replace characters the core (Latin-1) PDF fonts cannot encode.
+
+    Greek letters are spelled out ("α-SMA" becomes "alpha-SMA"); anything
+    else outside Latin-1 becomes "?" and is logged.
+
+    Args:
+        text: Report text
+
+    Returns:
+        Latin-1 encodable text
+    """
+    text = text.translate(_LATIN1_FALLBACKS)
+    if text.isascii():
+        return text
+    try:
+        text.encode("latin-1")
+        return text
+    except UnicodeEncodeError:
+        pass
+
+    chars = []
+    replaced = set()
+    for char in text:
+        if ord(char) < 256:
+            chars.append(char)
+            continue
+        name = unicodedata.name(char, "")
+        if name.startswith("GREEK ") and " LETTER " in name:
+            letter = name.split(" LETTER ", 1)[1].split()[0].lower()
+            chars.append(letter.capitalize() if "CAPITAL" in name else letter)
+        else:
+            chars.append("?")
+            replaced.add(char)
+
+    if replaced:
+        logger.warning(
+            f"fpdf2 core fonts cannot render {''.join(sorted(replaced))!r}; "
+            "set PDF_FONT_PATH to a Unicode TTF font"
+        )
+    return "".join(chars)
+
+
+def _register_unicode_font(pdf) -> bool:
+    """
+    Register the PDF_FONT_PATH TrueType font, if configured.
+
+    Args:
+        pdf: FPDF document
+
+    Returns:
+        True if the font was registered as UNICODE_FONT_FAMILY
+    """
+    font_path = settings.PDF_FONT_PATH
+    if not font_path:
+        return False
+
+    font_path = Path(font_path)
+    bold_path = font_path.with_name(f"{font_path.stem}-Bold{font_path.suffix}")
+    try:
+        pdf.add_font(UNICODE_FONT_FAMILY, "", str(font_path))
+        pdf.add_font(UNICODE_FONT_FAMILY, "B", str(bold_path if bold_path.exists() else font_path))
+    except (OSError, RuntimeError) as e:
+        logger.warning(f"Could not load PDF_FONT_PATH {font_path}, using Latin-1 core fonts: {e}")
+        return False
+    return True
+
+
+def render_pdf(
+    report: StructuredReport,
+    output_path: Path,
+    roi_images: list[tuple[int, dict, bytes]],
+) -> None:
+    """
+    Render a report as PDF with fpdf2.
+
+    Args:
+        report: Structured report
+        output_path: Output file path
+        roi_images: ROI thumbnails as (ROI number, patch info, JPEG bytes)
+    """
+    from fpdf import FPDF
+    from fpdf.enums import TableCellFillMode, XPos, YPos
+    from fpdf.fonts import FontFace
+
+    from .exporter import (
+        FINDING_FIELDS, PALETTE, PDF_DISCLAIMER, PDF_WRITE_BUFFER_SIZE, ROI_IMAGE_INCHES,
+    )
+
+    inch = POINTS_PER_INCH
+    margin = settings.PDF_MARGIN
+
+    pdf = FPDF(unit="pt", format="letter")
+    pdf.set_margins(margin, margin, margin)
+    pdf.set_auto_page_break(True, margin=margin)
+    pdf.add_page()
+
+    # Core fonts only cover Latin-1; a Unicode TTF renders the text as written
+    unicode_font = _register_unicode_font(pdf)
+    family = UNICODE_FONT_FAMILY if unicode_font else "helvetica"
+    encodable = str if unicode_font else _latin1
+
+    def font(style: str, size: float, color: str) -> None:
+        pdf.set_font(family, style, size)
+        pdf.set_text_color(PALETTE[color])
+
+    def section(title: str) -> None:
+        pdf.ln(16)
+        font("B", 13, "primary")
+        pdf.cell(0, 18, title, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.set_draw_color(PALETTE["primary"])
+        pdf.line(margin, pdf.get_y(), pdf.w - margin, pdf.get_y())
+        pdf.ln(8)
+
+    label_face = FontFace(emphasis="BOLD", size_pt=9, color=PALETTE["secondary"])
+
+    # --- HEADER ---
+    font("B", 26, "primary")
+    pdf.cell(0, 32, "PathoAssist", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    font("", 11, "secondary")
+    pdf.cell(0, 14, "AI-POWERED PATHOLOGY ANALYSIS REPORT", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.ln(0.1 * inch + 24)
+
+    # --- PATIENT & CASE DETAILS ---
+    md = report.slide_metadata
+    patient_age = str(md.patient_age) if md.patient_age else "Unknown"
+    patient_gender = md.patient_gender if md.patient_gender else "Unknown"
+    detail_rows = (
+        ("Age/Gender:", f"{patient_age} / {patient_gender}", "Case ID:", report.case_id[:16]),
+        ("Body Site:", md.body_site or "N/A", "Date:", report.analysis_date.strftime('%Y-%m-%d')),
+        ("Procedure:", md.procedure_type or "N/A", "Slide:", md.filename),
+    )
+
+    font("", 10, "text")
+    with pdf.table(
+        col_widths=(1, 2.5, 0.8, 2.7),
+        first_row_as_headings=False,
+        borders_layout="NONE",
+        text_align="LEFT",
+        line_height=13,
+        padding=4,
+    ) as table:
+        header = table.row()
+        for text in ("PATIENT DETAILS", "", "CASE DETAILS", ""):
+            header.cell(text, style=FontFace(emphasis="BOLD", size_pt=9,
+                                             color=PALETTE["secondary"], fill_color=PALETTE["accent"]))
+        for left_label, left_value, right_label, right_value in detail_rows:
+            row = table.row()
+            row.cell(left_label, style=label_face)
+            row.cell(encodable(left_value))
+            row.cell(right_label, style=label_face)
+            row.cell(encodable(right_value))
+
+    # --- CLINICAL HISTORY ---
+    if md.clinical_history:
+        section("Clinical History")
+        font("", 10, "text")
+        pdf.multi_cell(0, 15, encodable(md.clinical_history), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    # --- DIAGNOSTIC SUMMARY ---
+    section("Diagnostic Summary")
+    font("", 10, "text")
+    pdf.multi_cell(
+        0, 15,
+        f"**Tissue Classification:** {report.tissue_type.value.title()}",
+        markdown=True, new_x=XPos.LMARGIN, new_y=YPos.NEXT,
+    )
+    pdf.ln(4)
+    pdf.set_fill_color(PALETTE["summary_bg"])
+    pdf.set_draw_color("#D3D3D3")
+    pdf.multi_cell(
+        0, 16, encodable(report.narrative_summary.strip()),
+        border=1, fill=True, padding=10, new_x=XPos.LMARGIN, new_y=YPos.NEXT,
+    )
+
+    # --- MICROSCOPIC FINDINGS ---
+    section("Microscopic Findings")
+    findings = [
+        (feature_label, value)
+        for feature_label, attr in FINDING_FIELDS
+        if (value := getattr(report, attr))
+    ]
+    if findings:
+        font("", 10, "text")
+        with pdf.table(
+            col_widths=(2, 5),
+            headings_style=label_face,
+            borders_layout="HORIZONTAL_LINES",
+            cell_fill_color=PALETTE["accent"],
+            cell_fill_mode=TableCellFillMode.EVEN_ROWS,
+            text_align="LEFT",
+            line_height=15,
+            padding=4,
+        ) as table:
+            table.row(("Feature", "Observation"))
+            for feature_label, value in findings:
+                table.row((feature_label, encodable(value)))
+
+    if report.other_findings:
+        pdf.ln(0.1 * inch)
+        font("B", 9, "secondary")
+        pdf.cell(0, 12, "Detailed Observations:", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        font("", 10, "text")
+        for finding in report.other_findings:
+            pdf.multi_cell(0, 15, encodable(f"- {finding.finding}"), new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    # --- IMAGES ---
+    if roi_images:
+        pdf.add_page()
+        section("Selected Regions of Interest")
+        font("", 10, "text")
+        pdf.cell(0, 15, "The following areas were selected for AI analysis based on key features.",
+                 new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        pdf.ln(0.15 * inch)
+
+        column_width = 3.5 * inch
+        image_size = ROI_IMAGE_INCHES * inch
+        caption_height = 3 * 10
+        row_height = image_size + caption_height + 0.1 * inch
+
+        for position, (idx, patch, data) in enumerate(roi_images):
+            column = position % 2
+            if column == 0:
+                if pdf.will_page_break(row_height):
+                    pdf.add_page()
+                row_top = pdf.get_y()
+
+            x = margin + column * column_width
+            pdf.image(io.BytesIO(data), x=x + (column_width - image_size) / 2, y=row_top,
+                      w=image_size, h=image_size)
+
+            coords = patch.get("coordinates", {})
+            pdf.set_xy(x, row_top + image_size + 2)
+            font("", 8, "secondary")
+            pdf.multi_cell(
+                column_width, 10,
+                f"**ROI #{idx}**\nLoc: ({coords.get('x', 0)}, {coords.get('y', 0)})\n"
+                f"Var: {patch.get('variance_score', 0):.2f}",
+                align="C", markdown=True,
+            )
+
+            if column == 1 or position == len(roi_images) - 1:
+                pdf.set_xy(margin, row_top + row_height)
+
+    # --- DISCLAIMER ---
+    pdf.ln(0.5 * inch)
+    font("", 9, "warning_text")
+    pdf.set_fill_color(PALETTE["warning_bg"])
+    pdf.multi_cell(
+        0, 12, PDF_DISCLAIMER.replace("<b>", "**").replace("</b>", "**"),
+        fill=True, markdown=True, padding=6, new_x=XPos.LMARGIN, new_y=YPos.NEXT,
+    )
+
+    with open(output_path, 'wb', buffering=PDF_WRITE_BUFFER_SIZE) as f:
+        f.write(pdf.output())
@@ -1,5 +1,19 @@
 """AI inference module with MedGemma integration."""
-from .engine import InferenceEngine
-from .prompts import PromptBuilder
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .engine import InferenceEngine
+    from .prompts import PromptBuilder
 
 __all__ = ["InferenceEngine", "PromptBuilder"]
+
+
+def __getattr__(name: str):
+    """Import submodules on first access (the engine pulls in torch/transformers)."""
+    if name == "InferenceEngine":
+        from .engine import InferenceEngine
+        return InferenceEngine
+    if name == "PromptBuilder":
+        from .prompts import PromptBuilder
+        return PromptBuilder
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,12 +1,28 @@
+from __future__ import annotations
+
+import contextlib
+import copy
+import hashlib
+import heapq
+import importlib.util
+import itertools
+import os
+import re
 import time
-import torch
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import base64
 import io
+import numpy as np
+import orjson
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import TYPE_CHECKING, Optional, List, Dict, Any
 from PIL import Image
-from transformers import AutoProcessor, AutoModelForImageTextToText, BitsAndBytesConfig
 
 from ..config import settings
 from ..models import (
@@ -22,8 +38,258 @@ from ..utils import get_logger, log_inference
 from .prompts import PromptBuilder
 from .rag import AtlasStore, AtlasEntry
 
+if TYPE_CHECKING:
+    # torch and transformers are imported where used, so the API process
+    # starts (and answers health checks) without loading them
+    import torch
+    from transformers import BitsAndBytesConfig, LogitsProcessorList, StoppingCriteriaList
+
 logger = get_logger(__name__)
 
+# Let the Rust tokenizers encode batches on multiple threads (must be set
+# before the tokenizer is used)
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+
+PROMPT_CACHE_SIZE = 16  # Recently tokenized prompts kept per engine
+CHAT_KV_CACHE_SIZE = 4  # Cases whose chat KV cache is kept on the device
+CHAT_ROI_DESCRIPTIONS = 10  # Top-variance ROI patches described in remote chat (limits prompt size)
+ENCODED_PATCH_CACHE_SIZE = 64  # Encoded chat patch images kept (4 per case per chat)
+GREEDY_TEMPERATURE = 0.05  # At or below this, sampling is replaced by greedy decoding
+REMOTE_POOL_CONNECTIONS = 4  # Remote hosts kept in the HTTP pool
+REMOTE_POOL_MAXSIZE = 16  # Keep-alive connections per remote host
+CHAT_TEXT_PLACEHOLDER = "<<ANALYSIS_PROMPT>>"  # Stands in for the user text in cached chat templates
+
+HEATMAP_SIZE = 224  # Mock attention heatmap size (model input size)
+HEATMAP_BLOBS = 5  # Hotspots per mock heatmap
+# Heat level (0-255) -> RGBA: transparent yellow (cold) to red at 150 alpha (hot)
+HEATMAP_LUT = np.stack([
+    np.full(256, 255.0),
+    255 * (1 - np.linspace(0.0, 1.0, 256)),
+    np.zeros(256),
+    150 * np.linspace(0.0, 1.0, 256),
+], axis=1).astype(np.uint8)
+
+# Tissue type keyword stems, checked in priority order; substring matches, so
+# plurals and compounds ("smooth muscles", "myoepithelial") still match
+TISSUE_KEYWORDS = (
+    (("epitheli",), TissueType.EPITHELIAL),
+    (("connective", "stroma"), TissueType.CONNECTIVE),
+    (("muscle",), TissueType.MUSCLE),
+    (("nervous",), TissueType.NERVOUS),
+    (("blood",), TissueType.BLOOD),
+    (("mixed",), TissueType.MIXED),
+)
+_TISSUE_KEYWORD = re.compile("|".join(k for keywords, _ in TISSUE_KEYWORDS for k in keywords))
+
+# Model confidence labels -> (level, score); a confidence string mentioning
+# HIGH is HIGH, else one mentioning LOW is LOW, otherwise MEDIUM
+CONFIDENCE_SCORES = {
+    "HIGH": (ConfidenceLevel.HIGH, 0.85),
+    "MEDIUM": (ConfidenceLevel.MEDIUM, 0.65),
+    "LOW": (ConfidenceLevel.LOW, 0.45),
+}
+
+
+def _resize_patch(img: Image.Image, size: tuple = (224, 224)) -> Image.Image:
+    """
+    Resize a patch image to the model input size.
+
+    OpenCV's area interpolation (SIMD-accelerated) is used unless
+    PATCH_RESIZE_FILTER=lanczos asks for Pillow's Lanczos filter.
+
+    Args:
+        img: RGB patch image
+        size: Target (width, height)
+
+    Returns:
+        Resized image (the input itself when already at size)
+    """
+    if img.size == size:
+        return img
+    if settings.PATCH_RESIZE_FILTER == "lanczos":
+        return img.resize(size, Image.Resampling.LANCZOS)
+
+    import cv2
+
+    shrinking = img.size[0] >= size[0] and img.size[1] >= size[1]
+    interpolation = cv2.INTER_AREA if shrinking else cv2.INTER_LINEAR
+    return Image.fromarray(cv2.resize(np.asarray(img), size, interpolation=interpolation))
+
+
+@lru_cache(maxsize=None)
+def _turbojpeg():
+    """
+    Load the libjpeg-turbo encoder, if PyTurboJPEG is installed.
+
+    Returns:
+        TurboJPEG instance, or None to encode with Pillow
+    """
+    try:
+        from turbojpeg import TurboJPEG
+        return TurboJPEG()
+    except (ImportError, OSError, RuntimeError):
+        return None
+
+
+def _encode_image(img: Image.Image) -> bytes:
+    """
+    Encode an image for a remote inference request.
+
+    Args:
+        img: Image to encode
+
+    Returns:
+        Image file bytes in the REMOTE_IMAGE_FORMAT format
+    """
+    buffered = io.BytesIO()
+    if settings.REMOTE_IMAGE_FORMAT == "WEBP":
+        # method=0 is the fastest WebP encoder setting; still smaller than JPEG
+        img.save(buffered, format="WEBP", quality=80, method=0)
+    elif img.mode == "RGB" and (jpeg := _turbojpeg()) is not None:
+        # libjpeg-turbo's SIMD encoder, with Pillow's default 4:2:0 subsampling
+        from turbojpeg import TJPF_RGB, TJSAMP_420
+        return jpeg.encode(np.asarray(img), quality=85, pixel_format=TJPF_RGB, jpeg_subsample=TJSAMP_420)
+    else:
+        img.save(buffered, format="JPEG", quality=85)
+    return buffered.getvalue()
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    """
+    Get a file's modification time.
+
+    Args:
+        path: File path
+
+    Returns:
+        Modification time in nanoseconds, or None if the file does not exist
+    """
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _chat_prompt_parts(system_text: str, history: List[Dict[str, Any]], last_msg: str) -> tuple:
+    """
+    Build the local chat prompt as a reusable prefix and a per-turn part.
+
+    Args:
+        system_text: System prompt, including the case context
+        history: Messages before the new one
+        last_msg: New user message
+
+    Returns:
+        Tuple of (prefix, turn_text)
+    """
+    formatted_history = ""
+    for msg in history:
+        role = "User" if msg["role"] == "user" else "Assistant"
+        formatted_history += f"{role}: {msg['content']}\n"
+
+    return (
+        f"{system_text}\n\nCHAT HISTORY:\n",
+        f"{formatted_history}\nUser: {last_msg}\nAssistant:",
+    )
+
+
+def _chat_patch_description(idx: int, patch: Dict[str, Any]) -> str:
+    """
+    Describe an ROI patch for the remote chat prompt.
+
+    Args:
+        idx: Rank of the patch among the described patches
+        patch: Patch info from roi.json
+
+    Returns:
+        One-line patch description
+    """
+    patch_desc = f"Patch #{idx + 1} (ID: {patch.get('patch_id')})"
+    coords = patch.get("coordinates", {})
+    if coords:
+        patch_desc += f" - Location: ({coords.get('x', 0)}, {coords.get('y', 0)})"
+    tissue_ratio = patch.get("tissue_ratio", 0)
+    variance = patch.get("variance_score", 0)
+    patch_desc += f" - Tissue: {tissue_ratio:.0%}, Variance: {variance:.2f}"
+
+    # Include any pre-analyzed description
+    if patch.get("description"):
+        patch_desc += f" - Description: {patch['description']}"
+    return patch_desc
+
+
+def _classify_confidence(confidence_str: str) -> tuple:
+    """
+    Map a finding's confidence label to a level and score.
+
+    Args:
+        confidence_str: Confidence text from the model, e.g. "HIGH"
+
+    Returns:
+        (ConfidenceLevel, score) tuple
+    """
+    confidence_str = confidence_str.upper()
+    if "HIGH" in confidence_str:
+        return CONFIDENCE_SCORES["HIGH"]
+    if "LOW" in confidence_str:
+        return CONFIDENCE_SCORES["LOW"]
+    return CONFIDENCE_SCORES["MEDIUM"]
+
+
+def _attn_implementation(device: str) -> str:
+    """
+    Pick the fused attention kernel for a device.
+
+    FlashAttention-2 on CUDA when the flash_attn package is installed,
+    otherwise PyTorch's scaled_dot_product_attention (fused on every backend).
+
+    Args:
+        device: Device string
+
+    Returns:
+        Value for ``attn_implementation``
+    """
+    if device == "cuda" and importlib.util.find_spec("flash_attn") is not None:
+        return "flash_attention_2"
+    return "sdpa"
+
+
+def _supports_static_cache(model: Any) -> bool:
+    """
+    Check whether a model can decode into a pre-allocated static KV cache.
+
+    transformers 5 dropped ``_supports_static_cache`` in favour of
+    ``_can_compile_fullgraph``; both are checked so 4.x keeps working.
+
+    Args:
+        model: Loaded model
+
+    Returns:
+        True if ``cache_implementation="static"`` is supported
+    """
+    return bool(
+        getattr(model, "_can_compile_fullgraph", False) or getattr(model, "_supports_static_cache", False)
+    )
+
+
+def _sampling_kwargs(temperature: float, top_p: float) -> Dict[str, Any]:
+    """
+    Get generate() decoding arguments for a sampling temperature.
+
+    Greedy decoding skips the per-step softmax, top-p sort over the
+    vocabulary and RNG draw, and is deterministic.
+
+    Args:
+        temperature: Sampling temperature
+        top_p: Nucleus sampling probability mass
+
+    Returns:
+        Keyword arguments for ``model.generate``
+    """
+    if settings.DETERMINISTIC or temperature <= GREEDY_TEMPERATURE:
+        return {"do_sample": False, "num_beams": 1}
+    return {"do_sample": True, "temperature": temperature, "top_p": top_p}
+
 
 class InferenceEngine:
     """AI inference engine for pathology analysis using MedGemma with vision capabilities."""
@@ -39,6 +305,37 @@ class InferenceEngine:
         self.atlas_store = AtlasStore()
         self.is_loaded = False
         self.is_multimodal = False  # Track if model supports vision
+        # Serializes model work: one generation at a time (shared KV/activation
+        # memory, CUDA graph replay) and none while loading or unloading
+        self._model_lock = threading.RLock()
+        self._prompt_cache: OrderedDict[str, Dict[str, torch.Tensor]] = OrderedDict()
+        self._chat_prefix_cache: OrderedDict[str, torch.Tensor] = OrderedDict()  # Tokenized chat system prefixes
+        self._split_chat_tokens = False  # Prefix and turn tokenize separately (checked at load)
+        self._prompt_cache_lock = threading.Lock()  # Guards both tokenization caches
+        self._prefix_ids: Optional[torch.Tensor] = None  # Shared analysis prompt prefix
+        self._prefix_kv = None  # Its precomputed KV cache
+        self._input_dtype = None  # Load dtype; floating-point inputs are cast to it
+        self._cpu_autocast = False  # Generate under bf16 autocast (ipex-optimized CPU model)
+        self._chat_template_cache: Dict[tuple, tuple] = {}  # (system text, images) -> template parts
+        self._chat_kv: OrderedDict[str, tuple] = OrderedDict()  # case_id -> (token ids, KV cache)
+        self._chat_kv_lock = threading.Lock()
+        self._slide_handles: Dict[str, Any] = {}  # case_id -> OpenSlide, while patches are read
+        self._slide_handles_lock = threading.Lock()
+        self._encoded_patches: OrderedDict[tuple, bytes] = OrderedDict()  # (case_id, patch_id, format, PNG mtime) -> image bytes
+        self._encoded_patches_lock = threading.Lock()
+        self._chat_roi_cache: Dict[str, tuple] = {}  # case_id -> (roi.json mtime, patch count, top patches, descriptions)
+        self._http = self._create_http_session()
+        self._http2 = self._create_http2_client()  # Used instead of _http when REMOTE_HTTP2 is set
+        self._response_cache = None  # Semantic chat cache (CHAT_CACHE_MODEL), created at load
+
+        if settings.COMPILE_MODEL:
+            # Persist Inductor kernels and FX graphs so restarts skip recompilation;
+            # freezing folds the (constant) weights into the compiled graph
+            inductor_dir = settings.CACHE_DIR / "inductor"
+            os.environ.setdefault("TORCHINDUCTOR_CACHE_DIR", str(inductor_dir))
+            os.environ.setdefault("TORCHINDUCTOR_FX_GRAPH_CACHE", "1")
+            os.environ.setdefault("TORCHINDUCTOR_FREEZING", "1")
+            logger.info(f"Inductor compile cache: {os.environ['TORCHINDUCTOR_CACHE_DIR']}")
 
         if settings.REMOTE_INFERENCE_URL:
             logger.info(f"Configured Remote URL: {settings.REMOTE_INFERENCE_URL}")
@@ -47,6 +344,77 @@ class InferenceEngine:
             
         logger.info(f"Inference engine initialized (device: {self.device})")
 
+    def _create_http_session(self) -> requests.Session:
+        """
+        Create the pooled HTTP session used for remote inference.
+
+        Keep-alive connections skip the TCP/TLS handshake on every request,
+        and gateway errors from tunnels (ngrok/Colab) are retried briefly.
+
+        Returns:
+            Configured session
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=REMOTE_POOL_CONNECTIONS,
+            pool_maxsize=REMOTE_POOL_MAXSIZE,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.2,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({"POST"}),
+            ),
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _create_http2_client(self):
+        """
+        Create a pooled HTTP/2 client for remote inference, if configured.
+
+        HTTP/2 multiplexes concurrent requests over one connection.
+
+        Returns:
+            httpx.Client, or None when REMOTE_HTTP2 is off or httpx[http2]
+            is not installed
+        """
+        if not settings.REMOTE_HTTP2:
+            return None
+
+        try:
+            import httpx
+
+            return httpx.Client(
+                transport=httpx.HTTPTransport(http2=True, retries=2),
+                limits=httpx.Limits(max_connections=REMOTE_POOL_MAXSIZE),
+            )
+        except ImportError as e:
+            logger.warning(f"REMOTE_HTTP2 needs httpx[http2], using HTTP/1.1: {e}")
+            return None
+
+    def _create_response_cache(self):
+        """
+        Create the semantic chat response cache, if configured.
+
+        Returns:
+            ChatResponseCache, or None when CHAT_CACHE_MODEL is unset or
+            sentence-transformers is unavailable
+        """
+        if not settings.CHAT_CACHE_MODEL:
+            return None
+
+        try:
+            from .response_cache import ChatResponseCache
+
+            cache = ChatResponseCache(settings.CHAT_CACHE_MODEL, settings.CHAT_CACHE_THRESHOLD)
+        except Exception as e:
+            logger.warning(f"Chat response cache disabled: {e}")
+            return None
+
+        logger.info(f"Chat response cache enabled ({settings.CHAT_CACHE_MODEL})")
+        return cache
+
     def _detect_device(self) -> str:
         """
         Detect available device (GPU/CPU).
@@ -55,6 +423,8 @@ class InferenceEngine:
             Device string
         """
         if settings.DEVICE != "cpu":
+            import torch
+
             if torch.cuda.is_available():
                 return "cuda"
             elif hasattr(torch.backends, "mps") and torch.backends.mps.is_available():
@@ -66,13 +436,32 @@ class InferenceEngine:
         """
         Load MedGemma model and processor for multimodal inference.
 
+        Waits for any running generation to finish.
+
         Returns:
             True if successful
         """
+        with self._model_lock:
+            return self._load_model()
+
+    def _require_model(self) -> None:
+        """
+        Check the model is still loaded; call while holding ``_model_lock``.
+
+        Raises:
+            RuntimeError: If the model was unloaded while the request waited
+        """
+        if self.model is None:
+            raise RuntimeError("Model not loaded")
+
+    def _load_model(self) -> bool:
+        """Load the model; the caller holds ``_model_lock``."""
         if self.is_loaded:
             logger.info("Model already loaded")
             return True
 
+        self._response_cache = self._create_response_cache()
+
         if settings.REMOTE_INFERENCE_URL:
             logger.info(f"Using remote inference API at: {settings.REMOTE_INFERENCE_URL}")
             self.is_multimodal = True  # Assume remote model is multimodal (MedGemma)
@@ -80,16 +469,30 @@ class InferenceEngine:
             return True
 
         try:
+            import torch
+            from transformers import AutoProcessor, AutoModelForImageTextToText
+
             logger.info(f"Loading model: {self.model_name}")
 
             # Determine dtype based on device
             if self.device == "cuda":
-                torch_dtype = torch.bfloat16
+                # bf16 needs Ampere or newer; older GPUs fall back to fp16
+                torch_dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+                # Any remaining fp32 matmuls run on tensor cores; the vision tower's
+                # patch-embedding conv sees fixed 224x224 inputs, so autotune it once
+                torch.backends.cuda.matmul.allow_tf32 = True
+                torch.backends.cudnn.allow_tf32 = True
+                torch.backends.cudnn.benchmark = True
             elif self.device == "mps":
                 torch_dtype = torch.float16  # MPS works better with float16
             else:
                 torch_dtype = torch.float32
 
+            self._input_dtype = torch_dtype
+            quantization_config = self._quantization_config(torch_dtype)
+            attn_implementation = _attn_implementation(self.device)
+            logger.info(f"Attention implementation: {attn_implementation}")
+
             # Try loading as multimodal vision-language model first
             try:
                 self.processor = AutoProcessor.from_pretrained(
@@ -102,6 +505,8 @@ class InferenceEngine:
                     device_map="auto" if self.device != "cpu" else None,
                     trust_remote_code=True,
                     torch_dtype=torch_dtype,
+                    quantization_config=quantization_config,
+                    attn_implementation=attn_implementation,
                 )
                 self.is_multimodal = True
                 logger.info("Loaded as multimodal vision-language model")
@@ -115,6 +520,7 @@ class InferenceEngine:
                 
                 self.processor = AutoTokenizer.from_pretrained(
                     self.model_name,
+                    use_fast=True,
                     trust_remote_code=True,
                 )
                 
@@ -123,23 +529,527 @@ class InferenceEngine:
                     device_map="auto" if self.device != "cpu" else None,
                     trust_remote_code=True,
                     torch_dtype=torch_dtype,
+                    quantization_config=quantization_config,
+                    attn_implementation=attn_implementation,
                 )
                 self.is_multimodal = False
 
-            if self.device == "cpu":
-                self.model = self.model.to(self.device)
+            if self.device == "cpu":
+                self.model = self.model.to(self.device)
+
+            # Decoder-only models need left padding (prompt buckets pad on the left too)
+            tokenizer = getattr(self.processor, "tokenizer", self.processor)
+            tokenizer.padding_side = "left"
+            if not getattr(tokenizer, "is_fast", False):
+                logger.warning("Using a slow (pure Python) tokenizer; prompt encoding will be slower")
+
+            self._split_chat_tokens = self._chat_split_matches_joint(tokenizer)
+            if not self._split_chat_tokens:
+                logger.warning("Tokenizer merges across the chat prefix boundary; chat prompts are tokenized whole")
+
+            self.model.eval()
+
+            if self.device == "cpu":
+                self._optimize_for_cpu()
+
+            compile_model = settings.COMPILE_MODEL
+            if compile_model and self.device != "cuda":
+                logger.info(f"COMPILE_MODEL only applies on CUDA; running eager on {self.device}")
+                compile_model = False
+            elif compile_model and not hasattr(torch, "compile"):
+                logger.warning(f"COMPILE_MODEL needs torch>=2.0 (found {torch.__version__}); running eager")
+                compile_model = False
+
+            if compile_model:
+                # Fuse the decode step into CUDA graphs; fullgraph=False because
+                # bitsandbytes/remote-code layers cannot be captured whole
+                logger.info("Compiling model forward pass (torch.compile)")
+
+                # Pre-allocated, fixed-shape KV cache: one compiled graph serves
+                # every decode step instead of recompiling as the cache grows
+                self.model.generation_config.cache_implementation = "static"
+
+                # Prompts are padded to PROMPT_BUCKETS, so a few static shapes cover
+                # every call; each gets its own CUDA graph over a shared memory pool
+                import torch._inductor.config as inductor_config
+                inductor_config.triton.cudagraphs = True
+                inductor_config.triton.cudagraph_trees = True
+                torch._dynamo.config.cache_size_limit = max(
+                    torch._dynamo.config.cache_size_limit, 2 * len(settings.PROMPT_BUCKETS)
+                )
+
+                self.model.forward = torch.compile(
+                    self.model.forward,
+                    mode="reduce-overhead",
+                    dynamic=False,
+                    fullgraph=False,
+                )
+                self._warmup(runs=2)
+            else:
+                # Static caches cannot be seeded with a precomputed prefix
+                self._prefill_prefix()
+                if self.device != "cpu":
+                    self._warmup()
+
+            self.is_loaded = True
+
+            mode = "multimodal" if self.is_multimodal else "text-only"
+            logger.info(f"✓ Model loaded successfully on {self.device} ({mode})")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to load model: {e}")
+            self.is_loaded = False
+            return False
+
+    def _optimize_for_cpu(self) -> None:
+        """
+        Optimize a CPU model with Intel Extension for PyTorch, if installed.
+
+        ipex converts the weights to bf16 and swaps in oneDNN fused kernels,
+        which run on AMX / AVX-512 BF16 units on recent Xeons. Generation then
+        runs under bf16 autocast (see ``_autocast``). Without ipex the model
+        stays in fp32.
+        """
+        import torch
+
+        try:
+            import intel_extension_for_pytorch as ipex
+        except ImportError:
+            return
+
+        try:
+            self.model = ipex.optimize(self.model, dtype=torch.bfloat16)
+        except Exception as e:
+            logger.warning(f"ipex optimization failed, running fp32: {e}")
+            return
+
+        self._input_dtype = torch.bfloat16
+        self._cpu_autocast = True
+        logger.info("Optimized model for CPU with Intel Extension for PyTorch (bf16)")
+
+    def _autocast(self) -> contextlib.AbstractContextManager:
+        """
+        Get the autocast context for a generate() call.
+
+        Returns:
+            bf16 CPU autocast for an ipex-optimized model, otherwise a no-op
+        """
+        if not self._cpu_autocast:
+            return contextlib.nullcontext()
+
+        import torch
+
+        return torch.autocast("cpu", dtype=torch.bfloat16)
+
+    def _quantization_config(self, compute_dtype: torch.dtype) -> Optional[BitsAndBytesConfig]:
+        """
+        Build the bitsandbytes quantization config for model loading.
+
+        4-bit NF4 halves weight memory and bandwidth compared to 8-bit, which
+        is what bounds decode speed. For 8-bit, outlier decomposition is
+        disabled (threshold 0): the mixed fp16 fallback is much slower.
+
+        Args:
+            compute_dtype: dtype used for matmuls on dequantized weights
+
+        Returns:
+            Quantization config, or None when quantization is off or unsupported
+        """
+        if not settings.USE_QUANTIZATION or self.device != "cuda":
+            return None
+
+        from transformers import BitsAndBytesConfig
+
+        if settings.QUANT_BITS == 8:
+            logger.info("Quantizing model weights to 8-bit")
+            return BitsAndBytesConfig(load_in_8bit=True, llm_int8_threshold=0.0)
+        if settings.QUANT_BITS != 4:
+            logger.warning(f"Unsupported QUANT_BITS={settings.QUANT_BITS}; using 4-bit")
+
+        logger.info("Quantizing model weights to 4-bit NF4")
+        return BitsAndBytesConfig(
+            load_in_4bit=True,
+            bnb_4bit_quant_type="nf4",
+            bnb_4bit_use_double_quant=True,
+            bnb_4bit_compute_dtype=compute_dtype,
+        )
+
+    def _warmup(self, runs: int = 1) -> None:
+        """
+        Run short generations so one-time costs happen at load, not on the first request.
+
+        Covers lazy CUDA/cuDNN initialization and kernel autotuning, plus
+        graph compilation and CUDA graph capture when the model is compiled.
+        Multimodal models get a blank patch image so the vision tower is
+        exercised too.
+
+        Args:
+            runs: Number of generations (compiled models capture CUDA graphs
+                on a later call than the one that compiles)
+        """
+        import torch
+
+        start_time = time.time()
+        try:
+            if self.is_multimodal:
+                text = self._render_chat_prompt(self.prompt_builder.get_system_prompt(), "Describe this image.", 1)
+                image = Image.new("RGB", (settings.PATCH_SIZE, settings.PATCH_SIZE))
+                inputs = self.processor(text=text, images=[image], return_tensors="pt")
+            else:
+                inputs = self.processor("warmup", return_tensors="pt")
+            inputs = self._to_device(self._pad_to_bucket(dict(inputs)))
+
+            for _ in range(runs):
+                with torch.inference_mode():
+                    self.model.generate(**inputs, max_new_tokens=8, do_sample=False)
+
+            logger.info(f"Model warmup finished in {time.time() - start_time:.1f}s")
+        except Exception as e:
+            logger.warning(f"Model warmup failed: {e}")
+
+    def _prefill_prefix(self) -> None:
+        """
+        Precompute the KV cache of the prompt prefix every analysis shares.
+
+        The system turn and fixed template opening are identical for every
+        default-template analysis, so their prefill runs once here and
+        generate() only processes the rest of each prompt.
+        """
+        import torch
+
+        preamble = self.prompt_builder.get_analysis_preamble()
+        if self.is_multimodal:
+            messages = [
+                {"role": "system", "content": [{"type": "text", "text": self.prompt_builder.get_system_prompt()}]},
+                {"role": "user", "content": [{"type": "text", "text": preamble}]},
+            ]
+            templated = self.processor.apply_chat_template(messages, add_generation_prompt=False)
+            prefix_text = templated[:templated.index(preamble) + len(preamble)]
+        else:
+            prefix_text = preamble
+
+        try:
+            # The last token can merge with whatever follows the prefix, so leave it out
+            prefix_ids = self.processor(text=prefix_text, return_tensors="pt")["input_ids"][:, :-1]
+            prefix_ids = prefix_ids.to(self.model.device)
+            with torch.inference_mode():
+                self._prefix_kv = self.model(input_ids=prefix_ids, use_cache=True).past_key_values
+            self._prefix_ids = prefix_ids[0]
+            logger.info(f"Cached KV for a {prefix_ids.shape[-1]}-token shared prompt prefix")
+        except Exception as e:
+            logger.warning(f"Prompt prefix caching disabled: {e}")
+            self._prefix_ids = self._prefix_kv = None
+
+    def _prefix_cache_kwargs(self, inputs: Dict[str, torch.Tensor]) -> Dict[str, Any]:
+        """
+        Get generate() arguments that reuse the shared prefix KV cache.
+
+        Args:
+            inputs: Model inputs for a single prompt, on the model's device
+
+        Returns:
+            ``past_key_values`` seeded with the prefix when the prompt starts
+            with it, else an empty dict
+        """
+        import torch
+
+        # Image features are only merged in when prefill starts at position 0
+        if self._prefix_kv is None or "pixel_values" in inputs:
+            return {}
+
+        input_ids = inputs["input_ids"]
+        n = self._prefix_ids.shape[-1]
+        if input_ids.shape[0] != 1 or input_ids.shape[-1] <= n or not torch.equal(input_ids[0, :n], self._prefix_ids):
+            return {}
+
+        # generate() appends to the cache in place
+        return {"past_key_values": copy.deepcopy(self._prefix_kv)}
+
+    def _chat_cache_kwargs(self, case_id: str, inputs: Dict[str, torch.Tensor]) -> Dict[str, Any]:
+        """
+        Get generate() arguments that reuse the KV cache of the case's last chat turn.
+
+        Each turn's prompt repeats the previous one (system text and history),
+        so the cached keys/values are cropped to the longest common token
+        prefix and only the new tokens are prefilled. The entry is taken out
+        of the cache while in use; ``_store_chat_cache`` puts it back.
+
+        Args:
+            case_id: Case identifier
+            inputs: Model inputs for the chat prompt, on the model's device
+
+        Returns:
+            ``past_key_values`` covering the common prefix, else an empty dict
+        """
+        # Static (compiled) caches are fixed-size and cannot be cropped and reused
+        if settings.COMPILE_MODEL:
+            return {}
+
+        with self._chat_kv_lock:
+            entry = self._chat_kv.pop(case_id, None)
+        if entry is None:
+            return {}
+
+        cached_ids, cache = entry
+        input_ids = inputs["input_ids"][0]
+        # At least one prompt token must be left for generate() to prefill
+        n = min(cached_ids.shape[-1], input_ids.shape[-1] - 1)
+        mismatch = (cached_ids[:n] != input_ids[:n]).nonzero()
+        common = mismatch[0].item() if len(mismatch) else n
+        if common == 0 or not hasattr(cache, "crop"):
+            return {}
+
+        # Sliding-window layers (Gemma 3) drop states once the window fills;
+        # those cannot be rolled back to an earlier position
+        for layer in getattr(cache, "layers", ()):
+            if getattr(layer, "is_sliding", False) and layer.get_seq_length() >= layer.sliding_window:
+                return {}
+
+        try:
+            # A negative length removes that many tokens from the end
+            cache.crop(common - cache.get_seq_length())
+        except (RuntimeError, ValueError) as e:
+            logger.warning(f"Chat KV cache for case {case_id} not reusable: {e}")
+            return {}
+        return {"past_key_values": cache}
+
+    def _store_chat_cache(self, case_id: str, sequences: torch.Tensor, cache: Any) -> None:
+        """
+        Keep a chat turn's KV cache for the case's next turn.
+
+        Args:
+            case_id: Case identifier
+            sequences: Generated sequences (prompt and response)
+            cache: KV cache returned by generate()
+        """
+        if settings.COMPILE_MODEL or cache is None:
+            return
+
+        # The last generated token was never fed back, so it has no cache entry
+        with self._chat_kv_lock:
+            self._chat_kv[case_id] = (sequences[0, :-1], cache)
+            self._chat_kv.move_to_end(case_id)
+            if len(self._chat_kv) > CHAT_KV_CACHE_SIZE:
+                self._chat_kv.popitem(last=False)
+
+    def _tokenize(self, prompt: str) -> Dict[str, torch.Tensor]:
+        """
+        Tokenize a text-only prompt, reusing recent results.
+
+        Re-analysis and chat retries resend identical prompts, so a small LRU
+        of CPU tensors keyed on the prompt skips re-tokenizing them.
+
+        Args:
+            prompt: Prompt text
+
+        Returns:
+            Model inputs on the model's device
+        """
+        with self._prompt_cache_lock:
+            inputs = self._prompt_cache.get(prompt)
+            if inputs is not None:
+                self._prompt_cache.move_to_end(prompt)
+
+        if inputs is None:
+            # Tokenizers and multimodal processors both accept text=
+            inputs = self._pad_to_bucket(dict(self.processor(text=prompt, return_tensors="pt")))
+            inputs = self._pin(inputs)
+            with self._prompt_cache_lock:
+                self._prompt_cache[prompt] = inputs
+                if len(self._prompt_cache) > PROMPT_CACHE_SIZE:
+                    self._prompt_cache.popitem(last=False)
+
+        return self._to_device(inputs)
+
+    def _tokenize_chat(self, prefix: str, turn_text: str) -> Dict[str, torch.Tensor]:
+        """
+        Tokenize a chat prompt, reusing the tokenized system prefix.
+
+        The system text (with its case context) is identical across the turns
+        of a conversation, so only the history and new message are tokenized
+        per call; the prefix ids come from a small LRU. Tokenizers that merge
+        tokens across the boundary (checked at load) get the whole prompt
+        tokenized in one piece instead.
+
+        Args:
+            prefix: System text and history heading
+            turn_text: Chat history and the new user message
+
+        Returns:
+            Model inputs on the model's device
+        """
+        import torch
+
+        tokenizer = getattr(self.processor, "tokenizer", self.processor)
+
+        if not self._split_chat_tokens:
+            input_ids = tokenizer(prefix + turn_text, return_tensors="pt")["input_ids"]
+            inputs = {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
+            return self._to_device(self._pad_to_bucket(inputs))
+
+        with self._prompt_cache_lock:
+            prefix_ids = self._chat_prefix_cache.get(prefix)
+            if prefix_ids is not None:
+                self._chat_prefix_cache.move_to_end(prefix)
+
+        if prefix_ids is None:
+            prefix_ids = tokenizer(prefix, return_tensors="pt")["input_ids"]
+            with self._prompt_cache_lock:
+                self._chat_prefix_cache[prefix] = prefix_ids
+                if len(self._chat_prefix_cache) > PROMPT_CACHE_SIZE:
+                    self._chat_prefix_cache.popitem(last=False)
+
+        turn_ids = tokenizer(turn_text, add_special_tokens=False, return_tensors="pt")["input_ids"]
+        input_ids = torch.cat([prefix_ids, turn_ids], dim=1)
+        inputs = {"input_ids": input_ids, "attention_mask": torch.ones_like(input_ids)}
+        return self._to_device(self._pad_to_bucket(inputs))
+
+    def _chat_split_matches_joint(self, tokenizer) -> bool:
+        """
+        Check that split chat tokenization reproduces whole-prompt tokenization.
+
+        ``_tokenize_chat`` concatenates separately tokenized prefix and turn
+        ids, which is only valid if no token spans the boundary. Sample
+        first-turn and follow-up prompts are tokenized both ways.
+
+        Args:
+            tokenizer: Loaded tokenizer
+
+        Returns:
+            True if both tokenizations agree for every sample
+        """
+        system_text = self.prompt_builder.get_system_prompt()
+        samples = (
+            [],
+            [
+                {"role": "user", "content": "Is there necrosis?"},
+                {"role": "assistant", "content": "No necrosis is seen."},
+            ],
+        )
+        for history in samples:
+            prefix, turn_text = _chat_prompt_parts(system_text, history, "Describe the nuclei.")
+            split_ids = (
+                list(tokenizer(prefix)["input_ids"])
+                + list(tokenizer(turn_text, add_special_tokens=False)["input_ids"])
+            )
+            if split_ids != list(tokenizer(prefix + turn_text)["input_ids"]):
+                return False
+        return True
+
+    def _stopping_criteria(self, prompt: str, input_len: int) -> StoppingCriteriaList:
+        """
+        Build stopping criteria for an analysis generation.
+
+        Stopping at the end of the final section only applies when the prompt
+        ends with that section (the default template); custom templates only
+        get the repetition check.
+
+        Args:
+            prompt: Analysis prompt text
+            input_len: Prompt length in tokens
+
+        Returns:
+            Stopping criteria for ``model.generate``
+        """
+        from transformers import StoppingCriteriaList
+
+        from .stopping import FINAL_SECTION_MARKER, AnalysisStoppingCriteria
+
+        last_line = prompt.rstrip().rsplit("\n", 1)[-1]
+        tokenizer = getattr(self.processor, "tokenizer", self.processor)
+        return StoppingCriteriaList([
+            AnalysisStoppingCriteria(tokenizer, input_len, last_line.startswith(FINAL_SECTION_MARKER))
+        ])
+
+    def _logits_processor(self) -> LogitsProcessorList:
+        """
+        Build logits processors for a sampled generation.
+
+        Non-finite logits are sanitized before the temperature and top-p
+        warpers run, so a numerically unstable step no longer fails the
+        whole generation.
+
+        Returns:
+            Logits processors for ``model.generate``
+        """
+        from transformers import LogitsProcessorList
+
+        from .logits import SanitizeLogits
+
+        return LogitsProcessorList([SanitizeLogits()])
+
+    def _pin(self, inputs: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+        """
+        Page-lock CPU tensors bound for a CUDA model.
+
+        Args:
+            inputs: Model inputs (CPU tensors)
+
+        Returns:
+            Pinned inputs, or the inputs unchanged when not on CUDA
+        """
+        if self.model is None or self.model.device.type != "cuda":
+            return inputs
+        return {k: v if v.is_pinned() else v.pin_memory() for k, v in inputs.items()}
+
+    def _to_device(self, inputs: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+        """
+        Move model inputs to the model's device.
+
+        On CUDA the inputs are pinned and copied with ``non_blocking=True``, so
+        the host-to-device transfer overlaps with generate()'s setup instead of
+        stalling the CPU. Floating-point inputs (pixel values) are cast to the
+        model's load dtype in the same copy.
+
+        Args:
+            inputs: Model inputs (CPU tensors)
+
+        Returns:
+            Inputs on the model's device
+        """
+        device = self.model.device
+        non_blocking = device.type == "cuda"
+        return {
+            k: v.to(device, dtype=self._input_dtype if v.is_floating_point() else None, non_blocking=non_blocking)
+            for k, v in self._pin(inputs).items()
+        }
+
+    def _pad_to_bucket(self, inputs: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+        """
+        Left-pad prompts to the next PROMPT_BUCKETS length when compiled.
+
+        CUDA graphs captured by torch.compile are replayed only for inputs of
+        the same shape; snapping prompt lengths to a few buckets keeps the
+        number of captured graphs small. A no-op in eager mode.
+
+        Args:
+            inputs: Processor outputs (CPU tensors)
+
+        Returns:
+            Inputs with sequence tensors padded on the left
+        """
+        if not settings.COMPILE_MODEL:
+            return inputs
 
-            self.model.eval()
-            self.is_loaded = True
+        import torch
 
-            mode = "multimodal" if self.is_multimodal else "text-only"
-            logger.info(f"✓ Model loaded successfully on {self.device} ({mode})")
-            return True
+        seq_len = inputs["input_ids"].shape[-1]
+        bucket = next((b for b in sorted(settings.PROMPT_BUCKETS) if b >= seq_len), None)
+        if bucket is None or bucket == seq_len:
+            return inputs
 
-        except Exception as e:
-            logger.error(f"Failed to load model: {e}")
-            self.is_loaded = False
-            return False
+        tokenizer = getattr(self.processor, "tokenizer", self.processor)
+        pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        pad = (bucket - seq_len, 0)
+
+        padded = dict(inputs)
+        for key, value in inputs.items():
+            if value.dim() != 2 or value.shape[-1] != seq_len:
+                continue  # pixel values etc.
+            fill = pad_id if key == "input_ids" else 0  # attention mask, token types
+            padded[key] = torch.nn.functional.pad(value, pad, value=fill)
+        return padded
 
     def _create_refusal_result(self, case_id: str, reason: str, warnings: List[str] = []) -> AnalysisResult:
         """Create a safe refusal result when quality gates fail."""
@@ -154,6 +1064,84 @@ class InferenceEngine:
             processing_time=0.01,
         )
 
+    def _get_slide(self, case_id: str):
+        """
+        Get an open slide handle for a case, opening the slide at most once.
+
+        Opening a slide parses its whole pyramid, so patches read for the
+        same case share one handle (OpenSlide handles are thread-safe).
+
+        Args:
+            case_id: Case identifier
+
+        Returns:
+            OpenSlide (or VipsSlide) handle, or None if the case has no slide file
+        """
+        with self._slide_handles_lock:
+            slide = self._slide_handles.get(case_id)
+            if slide is not None:
+                return slide
+
+            # Look for common slide formats
+            case_dir = settings.CASES_DIR / case_id
+            slide_extensions = ['.svs', '.tiff', '.ndpi', '.mrxs', '.tif']
+            slide_files = [
+                f for f in case_dir.iterdir()
+                if f.suffix.lower() in slide_extensions
+            ]
+            if not slide_files:
+                return None
+
+            slide = None
+            if settings.SLIDE_READER == "pyvips":
+                try:
+                    from ..wsi.vips import VipsSlide
+                    slide = VipsSlide(slide_files[0])
+                except Exception as e:
+                    # pyvips not installed, or a format libvips cannot open
+                    logger.warning(f"pyvips reader unavailable for case {case_id}, using OpenSlide: {e}")
+
+            if slide is None:
+                import openslide
+                slide = openslide.OpenSlide(str(slide_files[0]))
+
+            self._slide_handles[case_id] = slide
+            return slide
+
+    def unload_case(self, case_id: str) -> None:
+        """
+        Drop the cached slide handle for a case.
+
+        The handle is closed once in-flight reads release it.
+
+        Args:
+            case_id: Case identifier
+        """
+        with self._slide_handles_lock:
+            self._slide_handles.pop(case_id, None)
+
+    def _save_patch_array(self, array_file: Path, img: Image.Image) -> None:
+        """
+        Cache a patch's decoded RGB pixels next to its PNG.
+
+        Re-analysis then memory-maps the array instead of decoding the PNG.
+        The PNG stays, as thumbnails, chat and exports read it.
+
+        Args:
+            array_file: Destination ``.npy`` path
+            img: RGB patch image
+        """
+        # Written under a unique name and renamed, so concurrent loaders never
+        # see a partial file
+        tmp_file = array_file.with_name(f".{array_file.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_file, "wb") as f:
+                np.save(f, np.asarray(img))
+            os.replace(tmp_file, array_file)
+        except OSError as e:
+            logger.warning(f"Could not cache patch array {array_file.name}: {e}")
+            tmp_file.unlink(missing_ok=True)
+
     def _load_patch_image(self, case_id: str, patch: PatchInfo) -> Optional[Image.Image]:
         """
         Load a patch image from the slide for the given patch info.
@@ -166,33 +1154,34 @@ class InferenceEngine:
             PIL Image of the patch or None if not available
         """
         try:
-            # Try to load from cached patch images first
+            # Try to load from cached patch images first: the raw pixel array
+            # (a plain read, no codec), then the PNG shared with the rest of the app
             patch_dir = settings.CASES_DIR / case_id / "patches"
             patch_file = patch_dir / f"{patch.patch_id}.png"
-            
-            if patch_file.exists():
-                return Image.open(patch_file).convert("RGB")
+            array_file = patch_dir / f"{patch.patch_id}.npy"
+
+            png_mtime = _mtime_ns(patch_file)
+            array_mtime = _mtime_ns(array_file)
+
+            # The array is only current if written after the PNG; a re-saved PNG
+            # (e.g. storage optimization re-extracting patches) supersedes it
+            if array_mtime is not None and (png_mtime is None or array_mtime >= png_mtime):
+                try:
+                    return Image.fromarray(np.load(array_file, mmap_mode="r"))
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignoring unreadable patch array {array_file.name}: {e}")
+
+            if png_mtime is not None:
+                img = Image.open(patch_file).convert("RGB")
+                self._save_patch_array(array_file, img)
+                return img
             
             # If no cached patch, extract from the original slide
-            # Find slide file in case directory
-            case_dir = settings.CASES_DIR / case_id
-            
-            # Look for common slide formats
-            slide_extensions = ['.svs', '.tiff', '.ndpi', '.mrxs', '.tif']
-            slide_files = [
-                f for f in case_dir.iterdir() 
-                if f.suffix.lower() in slide_extensions
-            ]
-            
-            if not slide_files:
-                logger.warning(f"No slide file found for case {case_id}")
-                return None
-                
-            # Import openslide to extract patch
             try:
-                import openslide
-                slide_path = slide_files[0]
-                slide = openslide.OpenSlide(str(slide_path))
+                slide = self._get_slide(case_id)
+                if slide is None:
+                    logger.warning(f"No slide file found for case {case_id}")
+                    return None
                 
                 # Extract patch region
                 patch_size = settings.PATCH_SIZE
@@ -202,11 +1191,10 @@ class InferenceEngine:
                     (patch_size, patch_size)
                 ).convert("RGB")
                 
-                slide.close()
-                
                 # Cache the patch for future use
                 patch_dir.mkdir(parents=True, exist_ok=True)
                 region.save(patch_file)
+                self._save_patch_array(array_file, region)
                 
                 return region
                 
@@ -218,12 +1206,85 @@ class InferenceEngine:
             logger.warning(f"Error loading patch image: {e}")
             return None
 
+    def _render_chat_prompt(self, system_text: str, text_prompt: str, num_images: int) -> str:
+        """
+        Render an analysis prompt through the processor's chat template.
+
+        Only the user text changes between analyses, so the template is
+        rendered once per (system prompt, image count) around a placeholder
+        and later prompts are spliced in without re-running Jinja.
+
+        Args:
+            system_text: System instruction
+            text_prompt: Analysis prompt text
+            num_images: Number of image markers before the text
+
+        Returns:
+            Templated prompt text with the generation prompt appended
+        """
+        key = (system_text, num_images)
+        parts = self._chat_template_cache.get(key)
+        if parts is None:
+            # Padded with spaces to detect templates that trim message text
+            placeholder = f" {CHAT_TEXT_PLACEHOLDER} "
+            user_content = [{"type": "image"}] * num_images  # Markers only, no image data
+            user_content.append({"type": "text", "text": placeholder})
+            messages = [
+                {"role": "system", "content": [{"type": "text", "text": system_text}]},
+                {"role": "user", "content": user_content},
+            ]
+            rendered = self.processor.apply_chat_template(messages, add_generation_prompt=True)
+            trims = placeholder not in rendered
+            head, tail = rendered.split(placeholder.strip() if trims else placeholder)
+            parts = self._chat_template_cache[key] = (head, tail, trims)
+
+        head, tail, trims = parts
+        return head + (text_prompt.strip() if trims else text_prompt) + tail
+
+    def _load_analysis_images(self, case_id: str, patches: List[PatchInfo]) -> List[Image.Image]:
+        """
+        Load the patch images sent to the model with an analysis.
+
+        All images go into a single prompt, so the vision encoder runs once
+        over a stacked batch of them.
+
+        Args:
+            case_id: Case identifier
+            patches: List of patch information (in priority order)
+
+        Returns:
+            Up to MAX_ANALYSIS_IMAGES images, resized to 224x224
+        """
+        max_images = settings.MAX_ANALYSIS_IMAGES
+        candidates = iter(patches[:max_images * 2])  # Try more patches in case some fail
+        patch_images = []
+
+        def load(patch: PatchInfo) -> Optional[Image.Image]:
+            img = self._load_patch_image(case_id, patch)
+            # Resize to reasonable size for model input
+            return _resize_patch(img) if img else None
+
+        # Slide reads, PNG decodes and resizes release the GIL; load each round
+        # of still-missing images in parallel, keeping patch order
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_images, os.cpu_count() or 4))) as executor:
+                while len(patch_images) < max_images:
+                    batch = list(itertools.islice(candidates, max_images - len(patch_images)))
+                    if not batch:
+                        break
+                    patch_images.extend(img for img in executor.map(load, batch) if img is not None)
+        finally:
+            self.unload_case(case_id)
+
+        return patch_images
+
     def _analyze_with_images(
         self,
         case_id: str,
         patches: List[PatchInfo],
         clinical_context: Optional[str] = None,
         template_content: Optional[str] = None,
+        patch_images: Optional[List[Image.Image]] = None,
     ) -> str:
         """
         Analyze patches using multimodal vision-language model.
@@ -233,23 +1294,16 @@ class InferenceEngine:
             patches: List of patch information
             clinical_context: Optional clinical context
             template_content: Optional custom template content
+            patch_images: Preloaded patch images (loaded here if omitted)
             
         Returns:
             Generated analysis text
         """
-        # Load a sample of patch images (limit to avoid memory issues)
-        max_images = 1  # Reduce to 1 image to ensure stability
-        patch_images = []
-        
-        for patch in patches[:max_images * 2]:  # Try more patches in case some fail
-            img = self._load_patch_image(case_id, patch)
-            if img:
-                # Resize to reasonable size for model input
-                img = img.resize((224, 224), Image.Resampling.LANCZOS)
-                patch_images.append(img)
-                if len(patch_images) >= max_images:
-                    break
-        
+        import torch
+
+        if patch_images is None:
+            patch_images = self._load_analysis_images(case_id, patches)
+
         # Build system message
         system_text = self.prompt_builder.get_system_prompt()
 
@@ -260,23 +1314,9 @@ class InferenceEngine:
             template_content=template_content
         )
 
-        # Build user message with images
-        if self.is_multimodal and patch_images:
-            # Build message with {"type": "image"} entries - processor handles token insertion
-            user_content = []
-            for _ in patch_images:
-                user_content.append({"type": "image"})  # Just marker, no actual image data here
-            user_content.append({"type": "text", "text": text_prompt})
-        else:
-            user_content = [{"type": "text", "text": text_prompt}]
-        
-        messages = [
-            {"role": "system", "content": [{"type": "text", "text": system_text}]},
-            {"role": "user", "content": user_content}
-        ]
-
-        # Prepare inputs - apply_chat_template handles token insertion for {"type": "image"}
-        text = self.processor.apply_chat_template(messages, add_generation_prompt=True)
+        # Prepare inputs - the chat template places the {"type": "image"} markers
+        num_images = len(patch_images) if self.is_multimodal else 0
+        text = self._render_chat_prompt(system_text, text_prompt, num_images)
         logger.info(f"Input prompt text (first 200 chars): {text[:200]}...")
         
         # Now tokenize + process with images
@@ -285,70 +1325,39 @@ class InferenceEngine:
             images=patch_images if self.is_multimodal and patch_images else None,
             return_tensors="pt",
             padding=True
-        ).to(self.device)
-        if self.device == "mps":
-            inputs = {k: v.to(self.device, dtype=torch.float16) if v.dtype == torch.bfloat16 else v.to(self.device) for k, v in inputs.items()}
-        else:
-            inputs = {k: v.to(self.model.device) for k, v in inputs.items()}
+        )
+        inputs = self._pad_to_bucket(dict(inputs))
+        inputs = self._to_device(inputs)
         
         input_len = inputs["input_ids"].shape[-1]
+        stopping_criteria = self._stopping_criteria(text_prompt, input_len)
 
-        # Generate with error handling and retry
-        try:
-            with torch.inference_mode():
-                generation = self.model.generate(
-                    **inputs,
-                    max_new_tokens=settings.MAX_TOKENS,
-                    do_sample=True,
-                    temperature=settings.TEMPERATURE, # Use configured temperature
-                    top_p=0.9,
-                    output_attentions=True,     # Request attentions for heatmap
-                    output_hidden_states=True,  # Request hidden states for embedding
-                    return_dict_in_generate=True,
-                    pad_token_id=self.processor.tokenizer.eos_token_id if hasattr(self.processor, 'tokenizer') else 0,
-                )
-        except RuntimeError as e:
-            if "probability tensor contains either `inf`, `nan`" in str(e):
-                logger.warning("Sampling failed due to numerical instability, retrying with greedy decoding...")
-                with torch.inference_mode():
-                    generation = self.model.generate(
-                        **inputs,
-                        max_new_tokens=settings.MAX_TOKENS,
-                        do_sample=False,  # Fallback to greedy
-                        pad_token_id=self.processor.tokenizer.eos_token_id if hasattr(self.processor, 'tokenizer') else 0,
-                    )
-            else:
-                raise e
-        
-        # Extract sequences from ModelOutput
-        generation_sequences = generation.sequences
-        generation_tokens = generation_sequences[0][input_len:]
-        decoded = self.processor.decode(generation_tokens, skip_special_tokens=True)
-        
-        # --- EXTRACT EMBEDDING (Last layer of last token of prompt or first generated token) ---
-        # NOTE: This is a simplified extraction. For robust RAG, we might want a separate embedding model.
-        # But to keep it "integrated", we use the LLM's hidden state.
-        if generation.hidden_states:
-            # hidden_states is tuple (one per token) of tuples (one per layer)
-            # Take the last token of the input prompt (or first generated) and last layer
-            # generation.hidden_states[0] is for the first generated token
-            last_layer = generation.hidden_states[0][-1] # Shape (Batch, Seq, Hidden)
-            # Take average pooling or just last token? Let's take global average of the last layer
-            embedding = last_layer.mean(dim=1).squeeze().cpu().numpy()
-            
-            # Store in a temporary cache or log it - for now just print shape
-            # In a real flow, we'd associate this with the patch if it was a single-patch analysis
-            logger.debug(f"Extracted embedding shape: {embedding.shape}")
-
-        logger.info(f"Raw generated text: {decoded}")
+        with torch.inference_mode(), self._autocast():
+            generation = self.model.generate(
+                **inputs,
+                max_new_tokens=settings.MAX_TOKENS,
+                stopping_criteria=stopping_criteria,
+                logits_processor=self._logits_processor(),
+                **self._prefix_cache_kwargs(inputs),
+                **_sampling_kwargs(settings.TEMPERATURE, settings.TOP_P),
+                pad_token_id=self.processor.tokenizer.eos_token_id if hasattr(self.processor, 'tokenizer') else 0,
+            )
 
-        # Clean up images to free memory
+        # Keep only the generated tokens, and release the prompt tensors, the
+        # full sequence and the patch images before decoding and parsing
+        generated_tokens = generation[0, input_len:].cpu()
+        del generation, inputs
         for img in patch_images:
             img.close()
-        
+        patch_images.clear()
+
         if self.device == "cuda":
             torch.cuda.empty_cache()
-        
+
+        decoded = self.processor.decode(generated_tokens, skip_special_tokens=True)
+
+        logger.info(f"Raw generated text: {decoded}")
+
         return decoded
 
     def _analyze_text_only(
@@ -368,6 +1377,8 @@ class InferenceEngine:
         Returns:
             Generated analysis text
         """
+        import torch
+
         # Build prompt using existing prompt builder
         prompt = self.prompt_builder.build_analysis_prompt(
             patches=patches,
@@ -376,26 +1387,91 @@ class InferenceEngine:
         )
 
         # Tokenize input
-        inputs = self.processor(prompt, return_tensors="pt")
-        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        inputs = self._tokenize(prompt)
+        input_len = inputs["input_ids"].shape[-1]
+
+        cache_kwargs = self._prefix_cache_kwargs(inputs)
+        if not cache_kwargs and _supports_static_cache(self.model):
+            # No shared prefix to seed the cache with: decode into a pre-allocated
+            # static cache rather than growing a dynamic one every step
+            cache_kwargs = {"cache_implementation": "static"}
 
         # Generate
-        with torch.no_grad():
+        with torch.inference_mode(), self._autocast():
             outputs = self.model.generate(
                 **inputs,
                 max_new_tokens=settings.MAX_TOKENS,
+                stopping_criteria=self._stopping_criteria(prompt, input_len),
+                use_cache=True,
+                **cache_kwargs,
                 do_sample=False,
                 pad_token_id=self.processor.eos_token_id,
             )
 
-        # Decode output
-        generated_text = self.processor.decode(outputs[0], skip_special_tokens=True)
+        # Decode only the generated tokens (the prompt is not re-decoded)
+        generated_text = self.processor.decode(outputs[0, input_len:], skip_special_tokens=True)
+
+        return generated_text.strip()
 
-        # Extract only the generated part (remove prompt)
-        if generated_text.startswith(prompt):
-            generated_text = generated_text[len(prompt):].strip()
+    def _post_remote(self, payload: Dict[str, Any], images: List[bytes], timeout: float) -> Dict[str, Any]:
+        """
+        Send a request to the remote inference API.
+
+        By default images go inline as base64 strings in the JSON ``images``
+        field. With REMOTE_IMAGE_TRANSPORT=multipart the JSON goes in a
+        ``payload`` form field and each image as a raw ``images`` file part,
+        avoiding the 33% base64 expansion; ``image_ids`` carries each image's
+        content hash so the server can cache images across requests.
+
+        Args:
+            payload: Request fields other than the images
+            images: Encoded images (REMOTE_IMAGE_FORMAT bytes)
+            timeout: Request timeout in seconds
+
+        Returns:
+            Parsed JSON response
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails
+        """
+        headers = {}
+        if settings.REMOTE_API_KEY:
+            headers["Authorization"] = f"Bearer {settings.REMOTE_API_KEY}"
+
+        if settings.REMOTE_IMAGE_TRANSPORT == "multipart":
+            image_ids = [hashlib.sha256(data).hexdigest()[:16] for data in images]
+            extension, mime_type = ("webp", "image/webp") if settings.REMOTE_IMAGE_FORMAT == "WEBP" else ("jpg", "image/jpeg")
+            files = [
+                ("images", (f"{image_id}.{extension}", data, mime_type))
+                for image_id, data in zip(image_ids, images)
+            ]
+            request = {
+                "data": {"payload": orjson.dumps({**payload, "image_ids": image_ids}).decode()},
+                "files": files,
+            }
+        else:
+            # orjson writes the KB-sized base64 strings far faster than the json module
+            headers["Content-Type"] = "application/json"
+            body = orjson.dumps({**payload, "images": [base64.b64encode(data).decode("ascii") for data in images]})
+            request = {"content" if self._http2 is not None else "data": body}  # httpx takes raw bodies as content=
+
+        if self._http2 is None:
+            response = self._http.post(settings.REMOTE_INFERENCE_URL, headers=headers, timeout=timeout, **request)
+            response.raise_for_status()
+        else:
+            import httpx
+
+            try:
+                response = self._http2.post(settings.REMOTE_INFERENCE_URL, headers=headers, timeout=timeout, **request)
+                response.raise_for_status()
+            except httpx.HTTPError as e:
+                # Callers handle one exception type for both clients
+                raise requests.exceptions.RequestException(str(e), response=getattr(e, "response", None)) from e
 
-        return generated_text
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError as e:
+            raise requests.exceptions.InvalidJSONError(f"Invalid JSON response: {e}", response=response) from e
 
     def _analyze_remote(self, text_prompt: str, patch_images: List[Image.Image], system_text: str) -> str:
         """
@@ -403,22 +1479,16 @@ class InferenceEngine:
         """
         logger.info(f"Sending request to remote API: {settings.REMOTE_INFERENCE_URL}")
         
-        # 1. Encode images to base64
+        # 1. Encode images (already resized to 224x224 by _load_analysis_images);
+        # Pillow's encoders release the GIL, so encode them concurrently
         encoded_images = []
-        for img in patch_images:
-            # Resize if too large to save bandwidth
-            if img.size[0] > 224 or img.size[1] > 224:
-                img = img.resize((224, 224))
-                
-            buffered = io.BytesIO()
-            img.save(buffered, format="JPEG", quality=85)
-            img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
-            encoded_images.append(img_str)
+        if patch_images:
+            with ThreadPoolExecutor(max_workers=min(len(patch_images), os.cpu_count() or 4)) as executor:
+                encoded_images = list(executor.map(_encode_image, patch_images))
             
         # 2. Construct payload
         payload = {
             "text": text_prompt,
-            "images": encoded_images,
             "system_prompt": system_text,  # Optional depending on colab implementation
             "parameters": {
                 "max_new_tokens": settings.MAX_TOKENS,
@@ -427,19 +1497,8 @@ class InferenceEngine:
         }
         
         # 3. Send Request
-        headers = {"Content-Type": "application/json"}
-        if settings.REMOTE_API_KEY:
-            headers["Authorization"] = f"Bearer {settings.REMOTE_API_KEY}"
-            
         try:
-            response = requests.post(
-                settings.REMOTE_INFERENCE_URL, 
-                json=payload, 
-                headers=headers,
-                timeout=120
-            )
-            response.raise_for_status()
-            result = response.json()
+            result = self._post_remote(payload, encoded_images, timeout=120)
             return result.get("response", "")
             
         except requests.exceptions.RequestException as e:
@@ -467,15 +1526,18 @@ class InferenceEngine:
 
         # --- HALLUCINATION PREVENTION (LAYER 1: QUALITY GATE) ---
         # Refuse analysis if insufficient tissue is present to avoid fabricating findings.
-        tissue_patches = [p for p in patches if not p.is_background]
+        # One pass over the patch objects; the checks below are array operations
+        is_tissue = ~np.fromiter((p.is_background for p in patches), dtype=bool, count=len(patches))
+        variance = np.fromiter((p.variance_score for p in patches), dtype=np.float64, count=len(patches))
+        tissue_count = int(is_tissue.sum())
         # Check 1: Tissue Sufficiency (Need at least some tissue to analyze)
-        if not tissue_patches or (len(tissue_patches) / max(len(patches), 1) < 0.1):
+        if not tissue_count or (tissue_count / max(len(patches), 1) < 0.1):
              logger.warning(f"Analysis REFUSED for case {case_id}: Insufficient tissue density.")
              return self._create_refusal_result(case_id, "Analysis Refused: Insufficient tissue detected. The model cannot reliably analyze this slide fragment.", warnings=["[REFUSAL] Tissue density < 10%"])
 
         # Check 2: Information Content (Variance)
         # If all patches are "flat" (low variance), likely blur or empty glass
-        if all(p.variance_score < 0.1 for p in tissue_patches):
+        if (variance[is_tissue] < 0.1).all():
              logger.warning(f"Analysis REFUSED for case {case_id}: Low variance/blur detected.")
              return self._create_refusal_result(case_id, "Analysis Refused: Image lacks sufficient detail (possible blur or artifact).", warnings=["[REFUSAL] Low variance/Focus quality issue"])
         # --------------------------------------------------------
@@ -487,14 +1549,7 @@ class InferenceEngine:
             # Load images if needed (remote or multimodal)
             patch_images = []
             if settings.REMOTE_INFERENCE_URL or self.is_multimodal:
-                max_images = 1 # Limit images
-                for patch in patches[:max_images * 2]:
-                    img = self._load_patch_image(case_id, patch)
-                    if img:
-                        img = img.resize((224, 224), Image.Resampling.LANCZOS)
-                        patch_images.append(img)
-                        if len(patch_images) >= max_images:
-                            break
+                patch_images = self._load_analysis_images(case_id, patches)
             
             # 1. REMOTE INFERENCE
             if settings.REMOTE_INFERENCE_URL:
@@ -513,20 +1568,25 @@ class InferenceEngine:
                 
             # 2. LOCAL MULTIMODAL
             elif self.is_multimodal:
-                generated_text = self._analyze_with_images(
-                    case_id=case_id,
-                    patches=patches,
-                    clinical_context=clinical_context,
-                    template_content=template_content,
-                )
+                with self._model_lock:
+                    self._require_model()
+                    generated_text = self._analyze_with_images(
+                        case_id=case_id,
+                        patches=patches,
+                        clinical_context=clinical_context,
+                        template_content=template_content,
+                        patch_images=patch_images,
+                    )
                 
             # 3. LOCAL TEXT-ONLY
             else:
-                generated_text = self._analyze_text_only(
-                    patches=patches,
-                    clinical_context=clinical_context,
-                    template_content=template_content,
-                )
+                with self._model_lock:
+                    self._require_model()
+                    generated_text = self._analyze_text_only(
+                        patches=patches,
+                        clinical_context=clinical_context,
+                        template_content=template_content,
+                    )
 
             # Check safety
             is_safe, violations = self.prompt_builder.check_safety(generated_text)
@@ -540,30 +1600,19 @@ class InferenceEngine:
             parsed = self.prompt_builder.parse_structured_output(generated_text)
 
             # Build findings
-            findings = []
-            for idx, finding_data in enumerate(parsed.get("findings", [])):
-                finding_text = finding_data.get("text", "")
-                confidence_str = finding_data.get("confidence", "MEDIUM").upper()
-
-                # Map confidence string to enum
-                if "HIGH" in confidence_str:
-                    confidence_level = ConfidenceLevel.HIGH
-                    confidence_score = 0.85
-                elif "LOW" in confidence_str:
-                    confidence_level = ConfidenceLevel.LOW
-                    confidence_score = 0.45
-                else:
-                    confidence_level = ConfidenceLevel.MEDIUM
-                    confidence_score = 0.65
-
-                finding = PathologyFinding(
-                    category=finding_data.get("category", f"Finding {idx + 1}"),
-                    finding=finding_text,
+            raw_findings = parsed.get("findings", [])
+            confidences = map(_classify_confidence, (f.get("confidence", "MEDIUM") for f in raw_findings))
+            findings = [
+                PathologyFinding(
+                    category=finding_data.get("category", f"Finding {idx}"),
+                    finding=finding_data.get("text", ""),
                     confidence=confidence_level,
                     confidence_score=confidence_score,
                     visual_evidence=finding_data.get("visual_evidence"),
                 )
-                findings.append(finding)
+                for idx, (finding_data, (confidence_level, confidence_score))
+                in enumerate(zip(raw_findings, confidences), start=1)
+            ]
 
             # Determine tissue type
             tissue_type_str = parsed.get("tissue_type") or "unknown"
@@ -590,8 +1639,7 @@ class InferenceEngine:
             differential_diagnosis = []
             for dd in parsed.get("differential_diagnosis", []):
                 # Normalize confidence to enum
-                conf_map = {"HIGH": ConfidenceLevel.HIGH, "MEDIUM": ConfidenceLevel.MEDIUM, "LOW": ConfidenceLevel.LOW}
-                likelihood = conf_map.get(dd.get("likelihood", "MEDIUM"), ConfidenceLevel.MEDIUM)
+                likelihood = CONFIDENCE_SCORES.get(dd.get("likelihood", "MEDIUM"), CONFIDENCE_SCORES["MEDIUM"])[0]
                 
                 differential_diagnosis.append(DifferentialDiagnosis(
                     condition=dd.get("condition", "Unknown Condition"),
@@ -727,63 +1775,73 @@ class InferenceEngine:
             # Better: Return the recommendation immediately if we can.
             pass # We'll handle this in the return payload or a separate tool call structure
 
+        # Near-duplicate questions under the same case context and earlier turns reuse the earlier answer
+        cache_embedding = None
+        if self._response_cache is not None and last_msg:
+            cache_embedding = self._response_cache.embed(last_msg)
+            cached = self._response_cache.lookup(case_id, system_text, messages[:-1], cache_embedding)
+            if cached is not None:
+                logger.info(f"Chat response for case {case_id} served from cache")
+                return {
+                    "message": {
+                        "role": "assistant",
+                        "content": cached,
+                        "timestamp": time.time()
+                    },
+                    "suggested_actions": actions
+                }
+
         # Run inference
         try:
             # Check if we should use remote inference (processor is None in remote mode)
             if settings.REMOTE_INFERENCE_URL and self.processor is None:
                 # Use remote chat API
-                return self._chat_remote(case_id, messages, system_text, actions)
+                response = self._chat_remote(case_id, messages, system_text, actions)
+                if cache_embedding is not None:
+                    self._response_cache.store(case_id, system_text, messages[:-1], cache_embedding, response["message"]["content"])
+                return response
             
             # Local inference fallback (if processor is available)
             if self.processor is None:
                 raise RuntimeError("Model processor not initialized")
-                
-            # Use simple text generation for now to avoid complex history management with images
-            # Ideally, we would re-feed images, but for performance, we rely on the context provided
-            
-            # Format history
-            formatted_history = ""
-            for msg in messages[:-1]:
-                role = "User" if msg["role"] == "user" else "Assistant"
-                formatted_history += f"{role}: {msg['content']}\n"
-            
-            prompt = f"{system_text}\n\nCHAT HISTORY:\n{formatted_history}\nUser: {last_msg}\nAssistant:"
-            
-            # Use appropriate encoding method
-            if hasattr(self.processor, "apply_chat_template"):
-                # Use simple tokenizer call if available
-                inputs = self.processor(text=prompt, return_tensors="pt")
-            elif hasattr(self.processor, "tokenizer"):
-                 # Multimodal processor
-                inputs = self.processor(text=prompt, return_tensors="pt")
-            else:
-                 # Standard tokenizer
-                inputs = self.processor(prompt, return_tensors="pt")
 
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            with self._model_lock:
+                self._require_model()
 
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    max_new_tokens=500,
-                    do_sample=True,
-                    temperature=0.7,
-                )
-            
-            response_text = self.processor.decode(outputs[0], skip_special_tokens=True)
-            
-            # Extract just the new response
-            if prompt in response_text:
-                response_text = response_text[len(prompt):].strip()
-            
-            return {
-                "message": {
-                    "role": "assistant",
-                    "content": response_text,
-                    "timestamp": time.time() # This will be formatted by API
-                },
-                "suggested_actions": actions
-            }
+                import torch
+
+                # Use simple text generation for now to avoid complex history management with images
+                # Ideally, we would re-feed images, but for performance, we rely on the context provided
+
+                # Padded to a PROMPT_BUCKETS length when compiled, so chat replays the
+                # compiled forward's CUDA graphs instead of recompiling per prompt length
+                inputs = self._tokenize_chat(*_chat_prompt_parts(system_text, messages[:-1], last_msg))
+                input_len = inputs["input_ids"].shape[-1]
+
+                with torch.inference_mode(), self._autocast():
+                    outputs = self.model.generate(
+                        **inputs,
+                        max_new_tokens=500,
+                        **self._chat_cache_kwargs(case_id, inputs),
+                        **_sampling_kwargs(0.7, settings.TOP_P),
+                        use_cache=True,
+                        return_dict_in_generate=True,
+                    )
+                self._store_chat_cache(case_id, outputs.sequences, outputs.past_key_values)
+
+                # Decode just the new response (the prompt is not re-decoded)
+                response_text = self.processor.decode(outputs.sequences[0, input_len:], skip_special_tokens=True).strip()
+                if cache_embedding is not None:
+                    self._response_cache.store(case_id, system_text, messages[:-1], cache_embedding, response_text)
+
+                return {
+                    "message": {
+                        "role": "assistant",
+                        "content": response_text,
+                        "timestamp": time.time() # This will be formatted by API
+                    },
+                    "suggested_actions": actions
+                }
 
         except Exception as e:
             logger.error(f"Chat failed: {e}")
@@ -817,56 +1875,22 @@ class InferenceEngine:
         patch_descriptions = []
         try:
             # Try to load ROI patches from the case
-            roi_file = settings.CASES_DIR / case_id / "results" / "roi.json"
-            if roi_file.exists():
-                import json
-                with open(roi_file, "r") as f:
-                    roi_data = json.load(f)
-                
-                patches = roi_data.get("selected_patches", [])
+            roi_patches = self._chat_roi_patches(case_id)
+            if roi_patches is not None:
+                total_patches, described_patches, descriptions = roi_patches
                 max_images = 4  # Limit actual images for performance
-                max_descriptions = 10  # Limit text descriptions to prevent timeout
-                
-                # Sort by variance (most interesting first) and take top N
-                sorted_patches = sorted(patches, key=lambda p: p.get("variance_score", 0), reverse=True)
-                
-                logger.info(f"Total patches: {len(patches)}, showing top {min(len(patches), max_descriptions)} by variance")
-                
-                # Include metadata for top N patches
-                for idx, patch in enumerate(sorted_patches[:max_descriptions]):
-                    patch_id = patch.get("patch_id")
-                    
-                    # Build per-patch description for ALL patches
-                    patch_desc = f"Patch #{idx + 1} (ID: {patch_id})"
-                    coords = patch.get("coordinates", {})
-                    if coords:
-                        patch_desc += f" - Location: ({coords.get('x', 0)}, {coords.get('y', 0)})"
-                    tissue_ratio = patch.get("tissue_ratio", 0)
-                    variance = patch.get("variance_score", 0)
-                    patch_desc += f" - Tissue: {tissue_ratio:.0%}, Variance: {variance:.2f}"
-                    
-                    # Include any pre-analyzed description
-                    if patch.get("description"):
-                        patch_desc += f" - Description: {patch['description']}"
-                    
-                    # Mark if image is included
-                    if len(encoded_images) < max_images:
+
+                logger.info(f"Total patches: {total_patches}, showing top {len(described_patches)} by variance")
+
+                attached = self._encode_chat_patches(case_id, described_patches, max_images)
+
+                # Include metadata for top N patches; mark and attach the image
+                # if the patch has one (first N only)
+                for idx, patch_desc in enumerate(descriptions):
+                    if idx in attached:
                         patch_desc += " [IMAGE ATTACHED]"
-                    
+                        encoded_images.append(attached[idx])
                     patch_descriptions.append(patch_desc)
-                    
-                    # Only load images for first N patches
-                    if patch_id and len(encoded_images) < max_images:
-                        patch_file = settings.CASES_DIR / case_id / "patches" / f"{patch_id}.png"
-                        if patch_file.exists():
-                            img = Image.open(patch_file).convert("RGB")
-                            if img.size[0] > 224 or img.size[1] > 224:
-                                img = img.resize((224, 224))
-                            
-                            buffered = io.BytesIO()
-                            img.save(buffered, format="JPEG", quality=85)
-                            img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
-                            encoded_images.append(img_str)
                 
                 if patch_descriptions:
                     logger.info(f"Including {len(patch_descriptions)} patch descriptions ({len(encoded_images)} with images) in chat context")
@@ -877,10 +1901,9 @@ class InferenceEngine:
         except Exception as e:
             logger.warning(f"Could not load patch images for chat: {e}")
         
-        # Construct payload with images
+        # Construct payload (images are attached by _post_remote)
         payload = {
             "text": text_prompt,
-            "images": encoded_images,  # Now includes actual images
             "system_prompt": system_text,
             "parameters": {
                 "max_new_tokens": 500,
@@ -888,19 +1911,8 @@ class InferenceEngine:
             }
         }
         
-        headers = {"Content-Type": "application/json"}
-        if settings.REMOTE_API_KEY:
-            headers["Authorization"] = f"Bearer {settings.REMOTE_API_KEY}"
-            
         try:
-            response = requests.post(
-                settings.REMOTE_INFERENCE_URL, 
-                json=payload, 
-                headers=headers,
-                timeout=90  # Increased timeout for chat with images
-            )
-            response.raise_for_status()
-            result = response.json()
+            result = self._post_remote(payload, encoded_images, timeout=90)  # Increased timeout for chat with images
             response_text = result.get("response", "I apologize, but I couldn't generate a response.")
             
             return {
@@ -918,6 +1930,112 @@ class InferenceEngine:
                 logger.error(f"API Error Response: {e.response.text}")
             raise RuntimeError(f"Remote Chat API Error: {str(e)}")
 
+    def _chat_roi_patches(self, case_id: str) -> Optional[tuple]:
+        """
+        Get a case's top-variance ROI patches for the remote chat prompt.
+
+        The ROI selection only changes when roi.json is rewritten, so the
+        parsed and ranked patches and their prompt lines are memoized per case
+        on the file's mtime instead of being rebuilt every chat turn.
+
+        Args:
+            case_id: Case identifier
+
+        Returns:
+            Tuple of (number of selected patches, top CHAT_ROI_DESCRIPTIONS
+            patches by variance, their prompt description lines), or None if
+            the case has no ROI selection
+        """
+        roi_file = settings.CASES_DIR / case_id / "results" / "roi.json"
+        try:
+            mtime = roi_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        cached = self._chat_roi_cache.get(case_id)
+        if cached is not None and cached[0] == mtime:
+            return cached[1:]
+
+        patches = orjson.loads(roi_file.read_bytes()).get("selected_patches", [])
+        # Most interesting first; same order as a stable descending sort
+        top = heapq.nlargest(CHAT_ROI_DESCRIPTIONS, patches, key=lambda p: p.get("variance_score", 0))
+        descriptions = [_chat_patch_description(idx, patch) for idx, patch in enumerate(top)]
+        self._chat_roi_cache[case_id] = (mtime, len(patches), top, descriptions)
+        return len(patches), top, descriptions
+
+    def _encode_chat_patches(self, case_id: str, patches: List[Dict[str, Any]], max_images: int) -> Dict[int, bytes]:
+        """
+        Encode the first ``max_images`` available patch images for a chat request.
+
+        Patches are decoded and encoded concurrently (Pillow releases the GIL),
+        in rounds that only replace patches whose image is missing.
+
+        Args:
+            case_id: Case identifier
+            patches: ROI patch dicts, in prompt order
+            max_images: Maximum number of images to attach
+
+        Returns:
+            Encoded images keyed by index into ``patches``
+        """
+        attached: Dict[int, bytes] = {}
+        candidates = iter([(idx, patch["patch_id"]) for idx, patch in enumerate(patches) if patch.get("patch_id")])
+
+        def encode(candidate: tuple) -> Optional[bytes]:
+            return self._encoded_chat_patch(case_id, candidate[1])
+
+        with ThreadPoolExecutor(max_workers=min(max_images, os.cpu_count() or 4)) as executor:
+            while len(attached) < max_images:
+                batch = list(itertools.islice(candidates, max_images - len(attached)))
+                if not batch:
+                    break
+                for (idx, _), encoded in zip(batch, executor.map(encode, batch)):
+                    if encoded is not None:
+                        attached[idx] = encoded
+
+        return attached
+
+    def _encoded_chat_patch(self, case_id: str, patch_id: str) -> Optional[bytes]:
+        """
+        Get a patch image, downsized and encoded, for a remote chat request.
+
+        Every chat turn attaches the same top patches, so the encoded images
+        are kept in a small LRU instead of decoding, resizing and re-encoding
+        the PNGs each turn.
+
+        Args:
+            case_id: Case identifier
+            patch_id: Patch identifier
+
+        Returns:
+            Image bytes in the REMOTE_IMAGE_FORMAT format, or None if the
+            patch image does not exist
+        """
+        patch_file = settings.CASES_DIR / case_id / "patches" / f"{patch_id}.png"
+        png_mtime = _mtime_ns(patch_file)
+        if png_mtime is None:
+            return None
+
+        # The PNG's mtime is part of the key, so a re-extracted patch is re-encoded
+        key = (case_id, patch_id, settings.REMOTE_IMAGE_FORMAT, png_mtime)
+        with self._encoded_patches_lock:
+            encoded = self._encoded_patches.get(key)
+            if encoded is not None:
+                self._encoded_patches.move_to_end(key)
+                return encoded
+
+        with Image.open(patch_file) as img:
+            img = img.convert("RGB")
+        if img.size[0] > 224 or img.size[1] > 224:
+            img = _resize_patch(img)
+        encoded = _encode_image(img)
+
+        with self._encoded_patches_lock:
+            self._encoded_patches[key] = encoded
+            if len(self._encoded_patches) > ENCODED_PATCH_CACHE_SIZE:
+                self._encoded_patches.popitem(last=False)
+        return encoded
+
     def _parse_tissue_type(self, tissue_str: str) -> TissueType:
         """
         Parse tissue type string to enum.
@@ -928,20 +2046,12 @@ class InferenceEngine:
         Returns:
             TissueType enum value
         """
-        tissue_str = tissue_str.lower()
+        # One scan finds every keyword; priority order then picks the type
+        found = set(_TISSUE_KEYWORD.findall(tissue_str.lower()))
 
-        tissue_mapping = {
-            "epithelial": TissueType.EPITHELIAL,
-            "connective": TissueType.CONNECTIVE,
-            "muscle": TissueType.MUSCLE,
-            "nervous": TissueType.NERVOUS,
-            "blood": TissueType.BLOOD,
-            "mixed": TissueType.MIXED,
-        }
-
-        for key, value in tissue_mapping.items():
-            if key in tissue_str:
-                return value
+        for keywords, tissue_type in TISSUE_KEYWORDS:
+            if not found.isdisjoint(keywords):
+                return tissue_type
 
         return TissueType.UNKNOWN
 
@@ -957,31 +2067,23 @@ class InferenceEngine:
         # or a mock heatmap (gaussian blobs on high-contrast areas).
         
         try:
-            # Generate a mock heatmap using PIL
-            # Create a 224x224 transparent image
-            import random
-            from PIL import ImageDraw
-            
-            heatmap = Image.new('RGBA', (224, 224), (0, 0, 0, 0))
-            draw = ImageDraw.Draw(heatmap)
-            
-            # Draw random "hotspots" (red/yellow/orange blobs)
-            # Simulating attention on nuclei
-            for _ in range(5):
-                x = random.randint(20, 200)
-                y = random.randint(20, 200)
-                radius = random.randint(20, 50)
-                
-                # Draw simple radial gradient blob (simulated by concentric circles)
-                for r in range(radius, 0, -5):
-                    alpha = int(150 * (1 - r/radius))
-                    # Color map: Red (high) -> Yellow (med)
-                    color = (255, int(255 * (r/radius)), 0, alpha)
-                    draw.ellipse((x-r, y-r, x+r, y+r), fill=color)
-            
-            # Save to buffer
+            # Generate a mock heatmap: random Gaussian "hotspots" simulating
+            # attention on nuclei, summed over the whole grid at once
+            rng = np.random.default_rng()
+            centers = rng.integers(20, 201, size=(HEATMAP_BLOBS, 2)).astype(np.float32)
+            sigmas = rng.integers(20, 51, size=HEATMAP_BLOBS).astype(np.float32) / 2
+
+            yy, xx = np.mgrid[0:HEATMAP_SIZE, 0:HEATMAP_SIZE].astype(np.float32)
+            dist2 = (xx - centers[:, 0, None, None]) ** 2 + (yy - centers[:, 1, None, None]) ** 2
+            heat = np.exp(-dist2 / (2 * sigmas[:, None, None] ** 2)).sum(axis=0)
+            heat /= heat.max()
+
+            # Color map: Red (high) -> Yellow (med), fading out
+            heatmap = Image.fromarray(HEATMAP_LUT[(heat * 255).astype(np.uint8)])
+
+            # Save to buffer (fast zlib level; the PNG is sent once)
             buffered = io.BytesIO()
-            heatmap.save(buffered, format="PNG")
+            heatmap.save(buffered, format="PNG", compress_level=1)
             img_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
             return img_str
             
@@ -990,7 +2092,12 @@ class InferenceEngine:
             return None  
 
     def unload_model(self):
-        """Unload model to free resources."""
+        """Unload model to free resources, once any running generation finishes."""
+        with self._model_lock:
+            self._unload_model()
+
+    def _unload_model(self):
+        """Unload the model; the caller holds ``_model_lock``."""
         if self.model:
             del self.model
             self.model = None
@@ -998,11 +2105,26 @@ class InferenceEngine:
         if self.processor:
             del self.processor
             self.processor = None
+
+        with self._prompt_cache_lock:
+            self._prompt_cache.clear()
+            self._chat_prefix_cache.clear()
+        self._split_chat_tokens = False
+        self._prefix_ids = self._prefix_kv = None
+        self._input_dtype = None
+        self._cpu_autocast = False
+        self._chat_template_cache.clear()
+        with self._chat_kv_lock:
+            self._chat_kv.clear()
+        self._response_cache = None
             
-        if self.device == "cuda":
-            torch.cuda.empty_cache()
-        elif self.device == "mps":
-            torch.mps.empty_cache()
+        if self.device in ("cuda", "mps"):
+            import torch
+
+            if self.device == "cuda":
+                torch.cuda.empty_cache()
+            else:
+                torch.mps.empty_cache()
             
         self.is_loaded = False
         logger.info("Model unloaded")
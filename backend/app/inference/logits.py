@@ -0,0 +1,31 @@
+"""
+Logits processors for local generation.
+
+Kept apart from the engine so torch and transformers are only imported
+once a model is actually used.
+"""
+import torch
+from transformers import LogitsProcessor
+
+# Finite stand-ins for non-finite logits; small enough to stay finite in fp16
+SANITIZED_LOGIT_MAX = 1e4
+SANITIZED_LOGIT_MIN = -1e4
+
+
+class SanitizeLogits(LogitsProcessor):
+    """
+    Replace ``inf``/``nan`` logits with large finite values.
+
+    Half-precision models occasionally emit non-finite logits, which makes
+    sampling fail with "probability tensor contains either `inf`, `nan`".
+    ``generate`` merges user-supplied processors in before it appends the
+    temperature and top-p warpers, so this runs ahead of them: the warpers
+    scale and filter finite scores, and top-p still masks the sanitized tail
+    afterwards. This lets the first generation pass succeed instead of
+    re-running it with greedy decoding.
+    """
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        return torch.nan_to_num(
+            scores, nan=SANITIZED_LOGIT_MIN, posinf=SANITIZED_LOGIT_MAX, neginf=SANITIZED_LOGIT_MIN
+        )
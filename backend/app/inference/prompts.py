@@ -112,6 +112,10 @@ class PromptBuilder:
         """Get the system instruction."""
         return self.system_instruction
 
+    def get_analysis_preamble(self) -> str:
+        """Get the fixed opening of prompts built from the default analysis template."""
+        return PATHOLOGY_ANALYSIS_TEMPLATE.split("{", 1)[0]
+
     def build_analysis_prompt(
         self,
         patches: List[PatchInfo],
@@ -0,0 +1,109 @@
+"""
+Semantic chat response cache (opt-in, ``CHAT_CACHE_MODEL``).
+
+Near-duplicate questions about the same case are answered from an earlier
+response instead of running the model or calling the remote API again.
+Questions are embedded with a small sentence-transformers model; the
+embeddings are unit length, so cosine similarity against every cached
+question is a single matrix-vector product. Entries are keyed by the
+conversation so far as well as the case context, so a follow-up question
+is only answered from a conversation with the same earlier turns. Requires
+the optional ``sentence-transformers`` package.
+"""
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+ENTRIES_PER_CONTEXT = 64  # Most recent responses kept per (case, system prompt, history)
+
+
+def _context_key(case_id: str, system_text: str, history: List[Dict[str, Any]]) -> Tuple[str, int]:
+    """Key for the case context and every turn before the new question."""
+    turns = tuple((msg["role"], msg["content"]) for msg in history)
+    return case_id, hash((system_text, turns))
+
+
+class ChatResponseCache:
+    """Per-case ring buffers of (question embedding, response) pairs."""
+
+    def __init__(self, model_name: str, threshold: float, encoder: Any = None):
+        """
+        Load the sentence embedding model.
+
+        Args:
+            model_name: sentence-transformers model name or path
+            threshold: Minimum cosine similarity for a cache hit
+            encoder: Already loaded encoder with a sentence-transformers
+                style ``encode``; model_name is ignored when given
+        """
+        if encoder is None:
+            from sentence_transformers import SentenceTransformer
+
+            encoder = SentenceTransformer(model_name, device="cpu")
+        self._encoder = encoder
+        self.threshold = threshold
+        self._entries: Dict[Tuple[str, int], Deque[Tuple[np.ndarray, str]]] = {}
+        self._lock = threading.Lock()
+
+    def embed(self, message: str) -> np.ndarray:
+        """
+        Embed a question, normalized for case and whitespace.
+
+        Args:
+            message: User message
+
+        Returns:
+            Unit-length float32 embedding
+        """
+        normalized = " ".join(message.lower().split())
+        return self._encoder.encode(normalized, normalize_embeddings=True).astype(np.float32)
+
+    def lookup(
+        self, case_id: str, system_text: str, history: List[Dict[str, Any]], embedding: np.ndarray
+    ) -> Optional[str]:
+        """
+        Find a cached response to a near-duplicate question.
+
+        Args:
+            case_id: Case identifier
+            system_text: System prompt (including case context) the answer was given under
+            history: Messages before the new question
+            embedding: Embedding of the new question
+
+        Returns:
+            Cached response text, or None on a miss
+        """
+        with self._lock:
+            entries = self._entries.get(_context_key(case_id, system_text, history))
+            if not entries:
+                return None
+            scores = np.stack([cached for cached, _ in entries]) @ embedding
+            best = int(np.argmax(scores))
+            return entries[best][1] if scores[best] >= self.threshold else None
+
+    def store(
+        self,
+        case_id: str,
+        system_text: str,
+        history: List[Dict[str, Any]],
+        embedding: np.ndarray,
+        response: str,
+    ) -> None:
+        """
+        Cache a response.
+
+        Args:
+            case_id: Case identifier
+            system_text: System prompt the answer was given under
+            history: Messages before the question
+            embedding: Embedding of the question
+            response: Response text
+        """
+        key = _context_key(case_id, system_text, history)
+        with self._lock:
+            entries = self._entries.get(key)
+            if entries is None:
+                entries = self._entries[key] = deque(maxlen=ENTRIES_PER_CONTEXT)
+            entries.append((embedding, response))
@@ -0,0 +1,85 @@
+"""
+Stopping criteria for local analysis generation.
+
+Kept apart from the engine so torch and transformers are only imported
+once a model is actually used.
+"""
+import re
+from typing import Any, Dict
+
+import torch
+from transformers import StoppingCriteria
+
+# The analysis prompt's last field; the answer is complete once that section
+# has content and is ended by a blank line (or EOS, which generate() handles)
+FINAL_SECTION_MARKER = "Limitations:"
+STOP_WINDOW_TOKENS = 8  # Trailing tokens decoded per step to spot the marker
+REPEAT_WINDOW_TOKENS = 32  # A block this long repeated back-to-back is a loop
+_BLANK_LINE_END = re.compile(r"\n[ \t]*\n[ \t]*$")
+
+# Per-row progress through the final section
+_BEFORE_MARKER, _AFTER_MARKER, _IN_CONTENT = range(3)
+
+
+class AnalysisStoppingCriteria(StoppingCriteria):
+    """
+    Stop analysis generation once the response format is complete.
+
+    Generation otherwise runs to max_new_tokens when the model keeps going
+    after the final section or falls into a repetition loop. The final
+    section may span several lines (e.g. a bulleted list), so it ends at the
+    first blank line after its content. Each step only decodes a short window
+    of trailing tokens.
+    """
+
+    def __init__(self, tokenizer: Any, input_len: int, stop_on_marker: bool = True):
+        """
+        Initialize stopping criteria.
+
+        Args:
+            tokenizer: Tokenizer used to decode generated tokens
+            input_len: Prompt length (generated tokens start here)
+            stop_on_marker: Stop once the FINAL_SECTION_MARKER section ends
+        """
+        self.tokenizer = tokenizer
+        self.input_len = input_len
+        self.stop_on_marker = stop_on_marker
+        self._progress: Dict[int, int] = {}
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        done = torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+        generated = input_ids[:, self.input_len:]
+        if generated.shape[-1] == 0:
+            return done
+
+        for row, tokens in enumerate(generated):
+            if self.stop_on_marker:
+                done[row] = self._final_section_done(row, tokens)
+
+            if tokens.shape[-1] >= 2 * REPEAT_WINDOW_TOKENS and torch.equal(
+                tokens[-REPEAT_WINDOW_TOKENS:], tokens[-2 * REPEAT_WINDOW_TOKENS:-REPEAT_WINDOW_TOKENS]
+            ):
+                done[row] = True
+
+        return done
+
+    def _final_section_done(self, row: int, tokens: torch.LongTensor) -> bool:
+        """Track one row through the final section; True once it has ended."""
+        progress = self._progress.get(row, _BEFORE_MARKER)
+        window = self.tokenizer.decode(tokens[-STOP_WINDOW_TOKENS:], skip_special_tokens=True)
+
+        if progress == _BEFORE_MARKER:
+            if FINAL_SECTION_MARKER not in window:
+                return False
+            # Content and its closing blank line may arrive in the same window
+            section = window.rsplit(FINAL_SECTION_MARKER, 1)[1]
+            progress = self._progress[row] = _IN_CONTENT if section.strip() else _AFTER_MARKER
+            return progress == _IN_CONTENT and bool(_BLANK_LINE_END.search(section))
+
+        if progress == _AFTER_MARKER:
+            # Blank lines straight after the marker do not end the section
+            if self.tokenizer.decode(tokens[-1:], skip_special_tokens=True).strip():
+                self._progress[row] = _IN_CONTENT
+            return False
+
+        return bool(_BLANK_LINE_END.search(window))
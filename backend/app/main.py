@@ -8,6 +8,7 @@ from typing import Optional
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse, JSONResponse
 
@@ -23,6 +24,8 @@ from .models import (
     AnalysisResult,
     StructuredReport,
     ReportExportRequest,
+    ReportExportBatchRequest,
+    ReportExportCasesRequest,
     ReportExportResult,
     HealthResponse,
     CaseStatus,
@@ -214,8 +217,8 @@ async def update_settings(new_settings: SystemSettings):
 
     if reload_required:
         logger.info("Settings changed detected, reloading model...")
-        inference_engine.unload_model()
-        success = inference_engine.load_model()
+        await run_in_threadpool(inference_engine.unload_model)
+        success = await run_in_threadpool(inference_engine.load_model)
         if not success:
             logger.warning("Failed to reload model with new settings")
     
@@ -643,8 +646,6 @@ async def get_patch_thumbnail(case_id: str, patch_id: str):
     slide_path = slide_files[0]
     
     try:
-        from fastapi.concurrency import run_in_threadpool
-        
         # Extract region (blocking)
         region = await run_in_threadpool(
             wsi_processor.get_slide_region,
@@ -811,7 +812,9 @@ async def chat_endpoint(request: ChatRequest):
             # Let's add a new key "raw_record" and update engine.py to use it
             context_dict["raw_record"] = raw_context
 
-        response_dict = inference_engine.chat(
+        # Generation is blocking; keep the event loop free for other requests
+        response_dict = await run_in_threadpool(
+            inference_engine.chat,
             case_id=request.case_id,
             messages=messages_dicts,
             context=context_dict
@@ -923,8 +926,9 @@ async def analyze_case(request: AnalysisRequest):
         else:
             logger.warning(f"Template {template_name} not found. Using default.")
 
-        # Run analysis
-        result = inference_engine.analyze_patches(
+        # Run analysis (blocking; keep the event loop free for other requests)
+        result = await run_in_threadpool(
+            inference_engine.analyze_patches,
             case_id=request.case_id,
             patches=selected_patches,
             clinical_context=full_context,
@@ -1035,6 +1039,76 @@ async def export_report(request: ReportExportRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/export/batch", response_model=list[ReportExportResult])
+async def export_report_batch(request: ReportExportBatchRequest):
+    """
+    Export report to several formats concurrently.
+
+    Args:
+        request: Batch export request
+
+    Returns:
+        Export results, one per requested format
+    """
+    validate_case_id(request.case_id)
+
+    # Load report
+    report = await storage_manager.load_report(request.case_id)
+    if not report:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    # Export
+    try:
+        # ReportLab layout and the worker-thread join run off the event loop
+        return await run_in_threadpool(
+            report_exporter.export_report_multi,
+            report=report,
+            formats=request.formats,
+            include_images=request.include_images,
+        )
+
+    except Exception as e:
+        logger.error(f"Batch export failed for case {request.case_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/export/cases", response_model=list[ReportExportResult])
+async def export_reports_batch(request: ReportExportCasesRequest):
+    """
+    Export several cases' reports to one format in parallel.
+
+    Args:
+        request: Multi-case export request
+
+    Returns:
+        Export results, in the order of ``case_ids``
+    """
+    case_ids = list(dict.fromkeys(request.case_ids))
+    for case_id in case_ids:
+        validate_case_id(case_id)
+
+    # Load reports
+    reports = []
+    for case_id in case_ids:
+        report = await storage_manager.load_report(case_id)
+        if not report:
+            raise HTTPException(status_code=404, detail=f"Report not found for case {case_id}")
+        reports.append(report)
+
+    # Export off the event loop; the exporter fans the reports out over processes
+    try:
+        return await run_in_threadpool(
+            report_exporter.export_reports_batch,
+            reports,
+            request.format,
+            request.include_images,
+        )
+
+    except Exception as e:
+        logger.error(f"Multi-case export failed for cases {case_ids}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/export/{case_id}/download")
 async def download_export(case_id: str, format: str = "pdf"):
     """
@@ -1042,7 +1116,7 @@ async def download_export(case_id: str, format: str = "pdf"):
 
     Args:
         case_id: Case identifier
-        format: Export format (pdf, json, txt)
+        format: Export format (pdf, json, json.zst, txt, msgpack)
 
     Returns:
         File response
@@ -1066,11 +1140,13 @@ async def download_export(case_id: str, format: str = "pdf"):
         "pdf": "application/pdf",
         "json": "application/json",
         "txt": "text/plain",
+        "msgpack": "application/msgpack",
+        "json.zst": "application/zstd",
     }
 
     return FileResponse(
         path=str(export_path),
-        media_type=media_types.get(format, "application/octet-stream"),
+        media_type=media_types.get(export_format.value, "application/octet-stream"),
         filename=export_path.name,
     )
 
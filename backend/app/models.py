@@ -45,6 +45,8 @@ class ExportFormat(str, Enum):
     PDF = "pdf"
     JSON = "json"
     TXT = "txt"
+    MSGPACK = "msgpack"
+    JSON_ZST = "json.zst"
 
 
 # ============================================================================
@@ -220,6 +222,20 @@ class ReportExportRequest(BaseModel):
     include_images: bool = False
 
 
+class ReportExportBatchRequest(BaseModel):
+    """Request to export report to several formats at once."""
+    case_id: str
+    formats: List[ExportFormat]
+    include_images: bool = False
+
+
+class ReportExportCasesRequest(BaseModel):
+    """Request to export several cases' reports to one format."""
+    case_ids: List[str]
+    format: ExportFormat
+    include_images: bool = False
+
+
 class ReportExportResult(BaseModel):
     """Result of report export."""
     case_id: str
@@ -416,7 +416,9 @@ class StorageManager:
         if not case_dir.exists():
             return False
 
+        # Removes the patch PNGs together with their cached .npy pixel arrays
         shutil.rmtree(case_dir)
+        shutil.rmtree(settings.CACHE_DIR / "pdf_thumbs" / case_id, ignore_errors=True)
         logger.info(f"Deleted case {case_id}")
 
         return True
@@ -0,0 +1,87 @@
+"""
+libvips slide reader (opt-in, ``SLIDE_READER=pyvips``).
+
+Reads small patch regions with ``pyvips.Region.fetch``, which copies
+pixels straight out of libvips' tile cache without building a pipeline
+per crop. Requires the optional ``pyvips`` package and a libvips built
+with OpenSlide support.
+"""
+import threading
+from pathlib import Path
+from typing import Tuple
+
+from PIL import Image
+
+
+class VipsSlide:
+    """Slide handle with an OpenSlide-compatible ``read_region``."""
+
+    def __init__(self, slide_path: Path):
+        """
+        Open a slide with libvips.
+
+        Args:
+            slide_path: Path to slide file
+
+        Raises:
+            pyvips.Error: If libvips cannot open the slide
+        """
+        import pyvips
+
+        self._pyvips = pyvips
+        self.slide_path = slide_path
+        base = pyvips.Image.openslideload(str(slide_path))
+        self._levels = {0: base}
+        self._downsamples = {
+            level: float(base.get(f"openslide.level[{level}].downsample"))
+            for level in range(int(base.get("openslide.level-count")))
+        }
+        self._levels_lock = threading.Lock()
+        # Regions are not thread-safe; each thread fetches through its own
+        self._local = threading.local()
+
+    def _level_image(self, level: int):
+        """Get the (shared, thread-safe) image for a pyramid level."""
+        with self._levels_lock:
+            image = self._levels.get(level)
+            if image is None:
+                image = self._levels[level] = self._pyvips.Image.openslideload(
+                    str(self.slide_path), level=level
+                )
+            return image
+
+    def read_region(self, location: Tuple[int, int], level: int, size: Tuple[int, int]) -> Image.Image:
+        """
+        Read a region, with the same arguments as ``OpenSlide.read_region``.
+
+        Args:
+            location: Top-left (x, y) in level 0 coordinates
+            level: Pyramid level
+            size: Region size (width, height) at that level
+
+        Returns:
+            RGBA PIL Image (areas outside the slide are transparent)
+        """
+        image = self._level_image(level)
+        downsample = self._downsamples[level]
+        x, y = int(location[0] / downsample), int(location[1] / downsample)
+        width, height = size
+
+        if x >= 0 and y >= 0 and x + width <= image.width and y + height <= image.height:
+            regions = getattr(self._local, "regions", None)
+            if regions is None:
+                regions = self._local.regions = {}
+            region = regions.get(level)
+            if region is None:
+                region = regions[level] = self._pyvips.Region.new(image)
+            data = region.fetch(x, y, width, height)
+        else:
+            # Clip to the slide and pad the rest, as OpenSlide does
+            left, top = max(x, 0), max(y, 0)
+            right, bottom = min(x + width, image.width), min(y + height, image.height)
+            if right <= left or bottom <= top:
+                return Image.new("RGBA", size, (0, 0, 0, 0))
+            clipped = image.crop(left, top, right - left, bottom - top)
+            data = clipped.embed(left - x, top - y, width, height).write_to_memory()
+
+        return Image.frombuffer("RGBA", size, data, "raw", "RGBA", 0, 1)
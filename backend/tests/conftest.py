@@ -0,0 +1,22 @@
+"""
+Shared test setup.
+
+Points every storage directory at a throwaway location before any app
+module (and its file loggers) is imported, so tests never write into the
+source tree's data directory.
+"""
+import tempfile
+from pathlib import Path
+
+from app.config import settings, init_directories
+
+_DATA_DIR = Path(tempfile.mkdtemp(prefix="pathoassist-tests-"))
+
+settings.DATA_DIR = _DATA_DIR
+settings.UPLOAD_DIR = _DATA_DIR / "uploads"
+settings.CASES_DIR = _DATA_DIR / "cases"
+settings.EXPORTS_DIR = _DATA_DIR / "exports"
+settings.MODELS_DIR = _DATA_DIR / "models"
+settings.LOGS_DIR = _DATA_DIR / "logs"
+settings.CACHE_DIR = _DATA_DIR / "cache"
+init_directories()
@@ -0,0 +1,228 @@
+
+import io
+import os
+import re
+import threading
+from types import SimpleNamespace
+
+import pytest
+import torch
+from PIL import Image
+from app.config import settings
+from app.inference.engine import InferenceEngine, _classify_confidence
+from app.models import ConfidenceLevel, PatchInfo, TissueType
+
+
+@pytest.fixture
+def engine():
+    return InferenceEngine()
+
+
+def test_unload_waits_for_running_generation(engine):
+    """Test that unloading blocks while model work holds the lock."""
+    unloaded = threading.Event()
+
+    def unload():
+        engine.unload_model()
+        unloaded.set()
+
+    with engine._model_lock:
+        worker = threading.Thread(target=unload)
+        worker.start()
+        assert not unloaded.wait(0.2)
+
+    worker.join(timeout=5)
+    assert unloaded.is_set()
+
+
+def test_require_model_after_unload(engine):
+    """Test that queued requests fail cleanly once the model is gone."""
+    engine.unload_model()
+    with engine._model_lock:
+        with pytest.raises(RuntimeError, match="Model not loaded"):
+            engine._require_model()
+
+
+@pytest.mark.parametrize("tissue_str, expected", [
+    ("Epithelial", TissueType.EPITHELIAL),
+    ("smooth muscles", TissueType.MUSCLE),
+    ("myoepithelial cells", TissueType.EPITHELIAL),
+    ("fibro-connective tissue", TissueType.CONNECTIVE),
+    ("blood vessels within epithelial lining", TissueType.EPITHELIAL),
+    ("muscle with mixed blood elements", TissueType.MUSCLE),
+    ("Epithelium", TissueType.EPITHELIAL),
+    ("stromal", TissueType.CONNECTIVE),
+    ("Nervous tissue", TissueType.NERVOUS),
+    ("adipose", TissueType.UNKNOWN),
+    ("", TissueType.UNKNOWN),
+])
+def test_parse_tissue_type(engine, tissue_str, expected):
+    """Test substring matching of tissue keywords in priority order."""
+    assert engine._parse_tissue_type(tissue_str) == expected
+
+
+@pytest.mark.parametrize("confidence_str, expected", [
+    ("HIGH", ConfidenceLevel.HIGH),
+    ("low", ConfidenceLevel.LOW),
+    ("LOW to HIGH", ConfidenceLevel.HIGH),
+    ("Low-High", ConfidenceLevel.HIGH),
+    ("MEDIUM", ConfidenceLevel.MEDIUM),
+    ("unclear", ConfidenceLevel.MEDIUM),
+])
+def test_classify_confidence_high_wins(confidence_str, expected):
+    """Test that HIGH takes precedence over LOW wherever it appears."""
+    level, _ = _classify_confidence(confidence_str)
+    assert level == expected
+
+
+def _patch(patch_id):
+    return PatchInfo(
+        patch_id=patch_id, x=0, y=0, level=0, magnification=40,
+        tissue_ratio=1.0, variance_score=0.0, is_background=False,
+        coordinates={'x': 0, 'y': 0, 'width': 8, 'height': 8},
+    )
+
+
+def test_patch_array_cached_next_to_png(engine):
+    """Test that a decoded PNG is cached as a .npy and read back from it."""
+    patch_dir = settings.CASES_DIR / "case-npy" / "patches"
+    patch_dir.mkdir(parents=True, exist_ok=True)
+    Image.new("RGB", (8, 8), (200, 10, 10)).save(patch_dir / "p1.png")
+
+    assert engine._load_patch_image("case-npy", _patch("p1")).getpixel((0, 0)) == (200, 10, 10)
+    assert (patch_dir / "p1.npy").exists()
+
+    (patch_dir / "p1.png").unlink()
+    assert engine._load_patch_image("case-npy", _patch("p1")).getpixel((0, 0)) == (200, 10, 10)
+
+
+def test_regenerated_png_supersedes_patch_array(engine):
+    """Test that a PNG newer than its .npy is decoded again."""
+    patch_dir = settings.CASES_DIR / "case-npy" / "patches"
+    patch_dir.mkdir(parents=True, exist_ok=True)
+    png_file = patch_dir / "p2.png"
+    Image.new("RGB", (8, 8), (200, 10, 10)).save(png_file)
+    engine._load_patch_image("case-npy", _patch("p2"))
+
+    Image.new("RGB", (8, 8), (10, 10, 200)).save(png_file)
+    # Age the cached array so it predates the regenerated PNG
+    stale = png_file.stat().st_mtime_ns - 1_000_000_000
+    os.utime(patch_dir / "p2.npy", ns=(stale, stale))
+
+    assert engine._load_patch_image("case-npy", _patch("p2")).getpixel((0, 0)) == (10, 10, 200)
+    assert (patch_dir / "p2.npy").stat().st_mtime_ns >= png_file.stat().st_mtime_ns
+
+
+class CharTokenizer:
+    """Character tokenizer with a BOS token; optionally merges blank lines."""
+
+    def __init__(self, merge_blank_lines):
+        self.pattern = re.compile(r"\n\n|." if merge_blank_lines else r".", re.S)
+        self.vocab = {"<bos>": 0}
+
+    def __call__(self, text, add_special_tokens=True, return_tensors=None):
+        ids = [0] if add_special_tokens else []
+        ids += [self.vocab.setdefault(piece, len(self.vocab)) for piece in self.pattern.findall(text)]
+        return {"input_ids": torch.tensor([ids]) if return_tensors == "pt" else ids}
+
+
+@pytest.mark.parametrize("merge_blank_lines, split", [(False, True), (True, False)])
+def test_chat_tokenization_matches_joint(engine, merge_blank_lines, split):
+    """Test that chat prompts tokenize the same whether split or whole."""
+    tokenizer = CharTokenizer(merge_blank_lines)
+    engine.processor = tokenizer
+    engine.model = SimpleNamespace(device=torch.device("cpu"))
+    engine._split_chat_tokens = engine._chat_split_matches_joint(tokenizer)
+    assert engine._split_chat_tokens == split
+
+    prefix, turn_text = "System\n\nCHAT HISTORY:\n", "\nUser: hi\nAssistant:"
+    for _ in range(2):  # Second call reuses the cached prefix when split
+        inputs = engine._tokenize_chat(prefix, turn_text)
+        assert inputs["input_ids"].tolist() == [tokenizer(prefix + turn_text)["input_ids"]]
+
+
+def _kv_cache(seq_len, sliding_window=None):
+    """DynamicCache holding seq_len tokens in a full and an optional sliding layer."""
+    from transformers import DynamicCache
+
+    kv = (torch.zeros(1, 1, seq_len, 2), torch.zeros(1, 1, seq_len, 2))
+    layers = [kv]
+    if sliding_window is not None:
+        layers.append(kv + (torch.tensor(sliding_window),))
+    return DynamicCache(ddp_cache_data=layers)
+
+
+@pytest.mark.parametrize("sliding_window", [None, 16])
+def test_chat_cache_cropped_to_common_prefix(engine, sliding_window):
+    """Test that the previous turn's cache is cropped to the shared prompt prefix."""
+    engine._chat_kv["case-kv"] = (torch.arange(6), _kv_cache(6, sliding_window))
+    inputs = {"input_ids": torch.tensor([[0, 1, 2, 3, 9, 9, 9]])}
+
+    cache = engine._chat_cache_kwargs("case-kv", inputs)["past_key_values"]
+    assert cache.get_seq_length() == 4
+    assert all(layer.get_seq_length() == 4 for layer in cache.layers)
+
+
+def test_chat_cache_skipped_past_sliding_window(engine):
+    """Test that a sliding-window cache past its window is not reused."""
+    engine._chat_kv["case-kv"] = (torch.arange(6), _kv_cache(6, sliding_window=4))
+    inputs = {"input_ids": torch.tensor([[0, 1, 2, 3, 9, 9, 9]])}
+
+    assert engine._chat_cache_kwargs("case-kv", inputs) == {}
+    assert "case-kv" not in engine._chat_kv
+
+
+def test_encoded_chat_patch_follows_png(engine):
+    """Test that a re-saved patch PNG is re-encoded for remote chat."""
+    patch_dir = settings.CASES_DIR / "case-chat" / "patches"
+    patch_dir.mkdir(parents=True, exist_ok=True)
+    png_file = patch_dir / "p1.png"
+    Image.new("RGB", (8, 8), (200, 10, 10)).save(png_file)
+
+    first = engine._encoded_chat_patch("case-chat", "p1")
+    assert engine._encoded_chat_patch("case-chat", "p1") is first
+
+    Image.new("RGB", (8, 8), (10, 10, 200)).save(png_file)
+    mtime = png_file.stat().st_mtime_ns + 1_000_000
+    os.utime(png_file, ns=(mtime, mtime))
+
+    second = engine._encoded_chat_patch("case-chat", "p1")
+    assert second != first
+    assert Image.open(io.BytesIO(second)).getpixel((0, 0))[2] > 150
+    assert engine._encoded_chat_patch("case-chat", "missing") is None
+
+
+class TextProcessor(CharTokenizer):
+    """Text-only processor: called with text=, decodes to a fixed reply."""
+
+    eos_token_id = 0
+
+    def __init__(self):
+        super().__init__(merge_blank_lines=False)
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "ok"
+
+
+class RecordingModel:
+    """Model stand-in that records generate() arguments."""
+
+    device = torch.device("cpu")
+
+    def __init__(self, can_compile_fullgraph):
+        self._can_compile_fullgraph = can_compile_fullgraph
+        self.generate_kwargs = None
+
+    def generate(self, input_ids, **kwargs):
+        self.generate_kwargs = kwargs
+        return torch.cat([input_ids, torch.tensor([[1]])], dim=1)
+
+
+@pytest.mark.parametrize("static", [True, False])
+def test_text_only_analysis_uses_static_cache(engine, static):
+    """Test that text-only analysis requests a static cache when the model supports it."""
+    engine.processor = TextProcessor()
+    engine.model = RecordingModel(can_compile_fullgraph=static)
+
+    assert engine._analyze_text_only([_patch("p1")]) == "ok"
+    assert (engine.model.generate_kwargs.get("cache_implementation") == "static") == static
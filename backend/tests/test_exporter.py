@@ -0,0 +1,255 @@
+
+import json
+import os
+import re
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import msgpack
+import pytest
+import reportlab
+import zstandard
+from PIL import Image
+from app.config import settings
+from app.export.exporter import ReportExporter
+from app.models import ExportFormat, SlideMetadata, StructuredReport, TissueType
+
+
+@pytest.fixture
+def report():
+    return StructuredReport(
+        case_id="case-42",
+        slide_metadata=SlideMetadata(
+            case_id="case-42",
+            filename="slide.svs",
+            file_size=1024,
+            dimensions=(2048, 1024),
+            level_count=1,
+            level_dimensions=[(2048, 1024)],
+            created_at=datetime(2024, 1, 2, 3, 4, 5),
+        ),
+        analysis_date=datetime(2024, 1, 2, 3, 4, 5),
+        tissue_type=TissueType.EPITHELIAL,
+        narrative_summary="Benign glandular tissue — no atypia.",
+        confidence_score=0.8,
+        disclaimer="For research use only.",
+    )
+
+
+@pytest.fixture
+def exporter(tmp_path):
+    exporter = ReportExporter()
+    exporter.exports_dir = tmp_path
+    return exporter
+
+
+def test_export_filename_scheme(exporter, report):
+    """Test epoch-millis/pid/sequence names that never collide."""
+    first = exporter.export_report(report, ExportFormat.JSON)
+    second = exporter.export_report(report, ExportFormat.JSON)
+
+    name = os.path.basename(first.file_path)
+    assert re.fullmatch(rf"case-42_\d{{13}}-{os.getpid()}-\d+\.json", name)
+    assert first.file_path != second.file_path
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("case-42_1700000000000-123-7.json", ("case-42", "json")),
+    ("case_with_underscores_1700000000000-1-0.pdf", ("case_with_underscores", "pdf")),
+    ("case-42_20240102_030405.txt", ("case-42", "txt")),
+    ("case_with_underscores_20240102_030405.msgpack", ("case_with_underscores", "msgpack")),
+    ("case-42_1700000000000-123-7.json.zst", ("case-42", "json.zst")),
+    ("case-42_20240102_030405.json.zst", ("case-42", "json.zst")),
+    ("case-42_1700000000000-123-7.json.tmp", None),
+    ("case-42_1700000000000-123-7.docx", None),
+    ("_20240102_030405.json", None),
+    ("noseparator.json", None),
+])
+def test_parse_export_name(name, expected):
+    """Test parsing of new, legacy and compound-extension export names."""
+    assert ReportExporter._parse_export_name(name) == expected
+
+
+def test_index_follows_directory_mtime(exporter, tmp_path):
+    """Test that the export index is reused until the directory mtime changes."""
+    (tmp_path / "case-1_1700000000000-1-0.json").write_bytes(b"{}")
+    assert [f["format"] for f in exporter.list_exports("case-1")] == ["json"]
+
+    # Same directory mtime: the cached index is served without a rescan
+    dir_stat = tmp_path.stat()
+    (tmp_path / "case-1_1700000000001-1-1.txt").write_bytes(b"")
+    os.utime(tmp_path, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns))
+    assert len(exporter.list_exports("case-1")) == 1
+
+    # Directory changed: the next lookup rescans
+    os.utime(tmp_path, ns=(dir_stat.st_atime_ns, dir_stat.st_mtime_ns + 1_000_000))
+    assert sorted(f["format"] for f in exporter.list_exports("case-1")) == ["json", "txt"]
+    assert exporter.get_export_path("case-1", ExportFormat.TXT).name == "case-1_1700000000001-1-1.txt"
+    assert exporter.get_export_path("case-1", ExportFormat.PDF) is None
+
+
+def test_export_invalidates_index(exporter, report):
+    """Test that a new export is listed immediately."""
+    assert exporter.list_exports(report.case_id) == []
+    result = exporter.export_report(report, ExportFormat.MSGPACK)
+    assert exporter.get_export_path(report.case_id, ExportFormat.MSGPACK) == exporter.exports_dir / os.path.basename(result.file_path)
+
+
+@pytest.mark.parametrize("precomputed", [False, True])
+def test_msgpack_and_zstd_round_trip(exporter, report, precomputed):
+    """Test that MessagePack and zstd JSON decode to the plain JSON export."""
+    report_data = report.model_dump() if precomputed else None
+    results = {
+        format: exporter.export_report(report, format, report_data=report_data)
+        for format in (ExportFormat.JSON, ExportFormat.JSON_ZST, ExportFormat.MSGPACK)
+    }
+
+    with open(results[ExportFormat.JSON].file_path, "rb") as f:
+        expected = json.load(f)
+    with open(results[ExportFormat.JSON_ZST].file_path, "rb") as f:
+        from_zstd = json.loads(zstandard.ZstdDecompressor().stream_reader(f).read())
+    with open(results[ExportFormat.MSGPACK].file_path, "rb") as f:
+        from_msgpack = msgpack.unpackb(f.read(), raw=False)
+
+    assert expected["case_id"] == "case-42"
+    assert expected["narrative_summary"] == "Benign glandular tissue — no atypia."
+    assert from_zstd == expected
+    assert from_msgpack == expected
+
+
+def test_export_written_atomically(exporter, report, monkeypatch):
+    """Test that exports are staged in a .tmp file and renamed into place."""
+    renames = []
+    real_replace = os.replace
+
+    def record_replace(src, dst):
+        renames.append((str(src), str(dst), os.path.getsize(src)))
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", record_replace)
+    result = exporter.export_report(report, ExportFormat.JSON)
+
+    assert renames == [(result.file_path + ".tmp", result.file_path, result.file_size)]
+    assert not list(exporter.exports_dir.glob("*.tmp"))
+
+
+def test_failed_export_leaves_no_files(exporter, report, monkeypatch):
+    """Test that a writer failure removes the staging file and publishes nothing."""
+    def failing_writer(report, output_path, report_data=None):
+        output_path.write_bytes(b"{partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(exporter, "_export_json", failing_writer)
+    with pytest.raises(OSError, match="disk full"):
+        exporter.export_report(report, ExportFormat.JSON)
+
+    assert list(exporter.exports_dir.iterdir()) == []
+    assert exporter.list_exports(report.case_id) == []
+
+
+def test_export_reports_batch(exporter, report):
+    """Test that several cases export in parallel processes, in input order."""
+    reports = [report.model_copy(update={"case_id": case_id}) for case_id in ("case-1", "case-2", "case-3")]
+
+    results = exporter.export_reports_batch(reports, ExportFormat.JSON)
+
+    assert [r.case_id for r in results] == ["case-1", "case-2", "case-3"]
+    for result in results:
+        with open(result.file_path, "rb") as f:
+            assert json.load(f)["case_id"] == result.case_id
+    assert exporter.get_export_path("case-2", ExportFormat.JSON) is not None
+
+
+def test_concurrent_thumbnails_use_separate_staging_files(exporter, tmp_path, monkeypatch):
+    """Test that threads building the same ROI thumbnail never share a .tmp file."""
+    patch_file = tmp_path / "p1.png"
+    Image.new("RGB", (1024, 1024), (200, 10, 10)).save(patch_file)
+
+    staged = []
+    real_replace = os.replace
+
+    def record_replace(src, dst):
+        staged.append(str(src))
+        real_replace(src, dst)
+
+    # Hold every thread until all of them are writing the same thumbnail
+    barrier = threading.Barrier(4)
+    write_thumbnail = exporter._write_thumbnail
+
+    def racing_write(*args):
+        barrier.wait(timeout=5)
+        write_thumbnail(*args)
+
+    monkeypatch.setattr(os, "replace", record_replace)
+    monkeypatch.setattr(exporter, "_write_thumbnail", racing_write)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        thumbs = list(executor.map(lambda _: exporter._prepare_patch_thumbnail("case-thumbs", patch_file), range(4)))
+
+    assert len(set(thumbs)) == 1
+    assert Image.open(thumbs[0]).format == "JPEG"
+    assert len(staged) == len(set(staged)) == 4
+    assert not list(thumbs[0].parent.glob("*.tmp"))
+
+
+@pytest.fixture
+def roi_case(report):
+    """Case directory with three selected ROI patches on disk."""
+    case_dir = settings.CASES_DIR / report.case_id
+    (case_dir / "patches").mkdir(parents=True, exist_ok=True)
+    (case_dir / "results").mkdir(parents=True, exist_ok=True)
+    patches = []
+    for i in range(3):
+        Image.new("RGB", (256, 256), (40 * i, 80, 160)).save(case_dir / "patches" / f"p{i}.png")
+        patches.append({
+            "patch_id": f"p{i}",
+            "coordinates": {"x": i * 256, "y": 0, "width": 256, "height": 256},
+            "variance_score": 0.5,
+        })
+    (case_dir / "results" / "roi.json").write_text(json.dumps({"selected_patches": patches}))
+    yield report
+    shutil.rmtree(case_dir)
+    shutil.rmtree(settings.CACHE_DIR / "pdf_thumbs" / report.case_id, ignore_errors=True)
+
+
+@pytest.mark.parametrize("font_path", [None, Path(reportlab.__file__).parent / "fonts" / "Vera.ttf"])
+def test_fpdf2_pdf_with_roi_images(exporter, roi_case, monkeypatch, font_path):
+    """Test the fpdf2 backend with ROI images, with and without a Unicode font."""
+    pytest.importorskip("fpdf")
+    from app.export import pdf_fpdf2
+
+    monkeypatch.setattr(settings, "PDF_BACKEND", "fpdf2")
+    monkeypatch.setattr(settings, "PDF_FONT_PATH", font_path)
+    latin1 = pdf_fpdf2._latin1
+    converted = []
+    monkeypatch.setattr(pdf_fpdf2, "_latin1", lambda text: converted.append(latin1(text)) or converted[-1])
+    report = roi_case.model_copy(update={"narrative_summary": "≥ 5 mitoses per 10 HPF; α-SMA positive."})
+
+    result = exporter.export_report(report, ExportFormat.PDF, include_images=True)
+
+    data = Path(result.file_path).read_bytes()
+    assert data.startswith(b"%PDF")
+    assert data.count(b"/Subtype /Image") == 3
+    # Text only goes through the Latin-1 fallbacks without a Unicode font
+    if font_path is None:
+        assert ">= 5 mitoses per 10 HPF; alpha-SMA positive." in converted
+    else:
+        assert converted == []
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("≥ 5 mitoses", ">= 5 mitoses"),
+    ("≤ 2 cm, ± 0.5", "<= 2 cm, ± 0.5"),
+    ("α-SMA and Ki-67 in ≈ 10%", "alpha-SMA and Ki-67 in ~ 10%"),
+    ("Δ change, 5 μm", "Delta change, 5 µm"),
+    ("plain – text…", "plain - text..."),
+    ("arrow ⇒ here", "arrow ? here"),
+])
+def test_latin1_fallbacks(text, expected):
+    """Test Latin-1 substitutions for the fpdf2 core fonts."""
+    from app.export.pdf_fpdf2 import _latin1
+
+    assert _latin1(text) == expected
+
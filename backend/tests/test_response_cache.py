@@ -0,0 +1,60 @@
+
+import numpy as np
+import pytest
+from app.inference.response_cache import ChatResponseCache
+
+
+class FakeEncoder:
+    """Encoder giving each distinct sentence its own orthogonal unit vector."""
+
+    def __init__(self):
+        self.sentences = []
+
+    def encode(self, sentence, normalize_embeddings=True):
+        if sentence not in self.sentences:
+            self.sentences.append(sentence)
+        vector = np.zeros(16, dtype=np.float32)
+        vector[self.sentences.index(sentence)] = 1.0
+        return vector
+
+
+@pytest.fixture
+def cache():
+    return ChatResponseCache("unused", threshold=0.9, encoder=FakeEncoder())
+
+
+HISTORY = [
+    {"role": "user", "content": "What grade is this tumour?"},
+    {"role": "assistant", "content": "Grade 2."},
+]
+
+
+def test_same_question_same_history_hits(cache):
+    """Test that a repeated question in the same conversation is served from cache."""
+    embedding = cache.embed("Why?")
+    cache.store("case-1", "system", HISTORY, embedding, "Because of the mitoses.")
+
+    assert cache.lookup("case-1", "system", list(HISTORY), cache.embed("  why? ")) == "Because of the mitoses."
+
+
+def test_same_question_different_history_misses(cache):
+    """Test that a follow-up question is not reused across different earlier turns."""
+    embedding = cache.embed("Why?")
+    cache.store("case-1", "system", HISTORY, embedding, "Because of the mitoses.")
+
+    other = [
+        {"role": "user", "content": "Is there necrosis?"},
+        {"role": "assistant", "content": "No."},
+    ]
+    assert cache.lookup("case-1", "system", other, embedding) is None
+    assert cache.lookup("case-1", "system", [], embedding) is None
+
+
+def test_other_case_or_question_misses(cache):
+    """Test misses for a different case, system prompt or question."""
+    embedding = cache.embed("Why?")
+    cache.store("case-1", "system", HISTORY, embedding, "Because of the mitoses.")
+
+    assert cache.lookup("case-2", "system", HISTORY, embedding) is None
+    assert cache.lookup("case-1", "other system", HISTORY, embedding) is None
+    assert cache.lookup("case-1", "system", HISTORY, cache.embed("How big?")) is None
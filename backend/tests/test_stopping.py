@@ -0,0 +1,57 @@
+
+import torch
+from app.inference.stopping import AnalysisStoppingCriteria
+
+
+class FakeTokenizer:
+    """Tokenizer over a fixed vocabulary of text pieces."""
+
+    def __init__(self, pieces):
+        self.pieces = list(dict.fromkeys(pieces))
+
+    def encode(self, pieces):
+        return [self.pieces.index(piece) for piece in pieces]
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(self.pieces[int(i)] for i in ids)
+
+
+def run_until_stop(pieces, prompt_len=3):
+    """Feed generated pieces one step at a time; return the text when stopped."""
+    tokenizer = FakeTokenizer(["<p>"] + pieces)
+    prompt = [0] * prompt_len
+    generated = tokenizer.encode(pieces)
+    criteria = AnalysisStoppingCriteria(tokenizer, prompt_len)
+
+    for step in range(1, len(generated) + 1):
+        input_ids = torch.tensor([prompt + generated[:step]])
+        if criteria(input_ids, None)[0]:
+            return tokenizer.decode(generated[:step])
+    return None
+
+
+def test_multiline_limitations_run_to_blank_line():
+    """Test that a bulleted limitations section is not cut at its first newline."""
+    pieces = ["Summary: ok", "\n", "Limitations:", "\n", "- small", " sample", "\n",
+              "- no", " IHC", "\n", "\n", "Extra", " text"]
+    text = run_until_stop(pieces)
+    assert text is not None
+    assert text.endswith("- no IHC\n\n")
+
+
+def test_single_line_limitations_stop_at_blank_line():
+    """Test that inline limitations stop at the following blank line."""
+    pieces = ["Limitations:", " None", " noted", "\n", "\n", "Extra"]
+    assert run_until_stop(pieces) == "Limitations: None noted\n\n"
+
+
+def test_blank_line_after_marker_does_not_stop():
+    """Test that an empty line right after the marker keeps generating."""
+    pieces = ["Limitations:", "\n", "\n", "- limited", " tissue", "\n", "\n"]
+    assert run_until_stop(pieces) == "Limitations:\n\n- limited tissue\n\n"
+
+
+def test_unfinished_section_runs_to_eos():
+    """Test that a section without a blank line is left for EOS to end."""
+    pieces = ["Limitations:", "\n", "- one", "\n", "- two"]
+    assert run_until_stop(pieces) is None
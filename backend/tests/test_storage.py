@@ -0,0 +1,20 @@
+
+import numpy as np
+from app.config import settings
+from app.storage import StorageManager
+
+
+def test_delete_case_removes_patch_arrays():
+    """Test that deleting a case removes its patch PNGs and cached .npy arrays."""
+    storage = StorageManager()
+    case_dir = storage.create_case("case-delete")
+    patch_dir = case_dir / "patches"
+    (patch_dir / "p1.png").write_bytes(b"")
+    np.save(patch_dir / "p1.npy", np.zeros((2, 2, 3), dtype=np.uint8))
+    thumbs_dir = settings.CACHE_DIR / "pdf_thumbs" / "case-delete"
+    thumbs_dir.mkdir(parents=True)
+
+    assert storage.delete_case("case-delete")
+    assert not case_dir.exists()
+    assert not thumbs_dir.exists()
+    assert not storage.delete_case("case-delete")
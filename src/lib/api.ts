@@ -12,6 +12,7 @@ import type {
   StructuredReport,
   ReportExportRequest,
   ReportExportResult,
+  ExportFormat,
   CaseStatusResponse,
   CaseSummary,
   HealthResponse,
@@ -211,7 +212,7 @@ export async function exportReport(
  */
 export async function downloadExport(
   caseId: string,
-  format: 'pdf' | 'json' | 'txt' = 'pdf'
+  format: ExportFormat = 'pdf'
 ): Promise<Blob> {
   const response = await fetch(
     `${API_BASE_URL}/export/${caseId}/download?format=${format}`
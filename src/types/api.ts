@@ -46,7 +46,7 @@ export type TissueType =
 
 export type ConfidenceLevel = 'high' | 'medium' | 'low';
 
-export type ExportFormat = 'pdf' | 'json' | 'txt';
+export type ExportFormat = 'pdf' | 'json' | 'json.zst' | 'txt' | 'msgpack';
 
 // WSI Models
 export interface SlideMetadata {